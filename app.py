@@ -1,50 +1,43 @@
-import pandas as pd
+import numpy as np
 import random
 from collections import defaultdict
 import time
 import csv
 import json
-from tabulate import tabulate
-from itertools import product
-
-# Load data from CSV file
-def load_data(file_path):
-    df = pd.read_csv(file_path)
-    upcoming_matches = df[df['Result'].isnull()]
-    points_table = {
-        'Kolkata Knight Riders': 0,
-        'Royal Challengers Bengaluru': 0,
-        'Delhi Capitals': 0,
-        'Mumbai Indians': 0,
-        'Chennai Super Kings': 0,
-        'Rajasthan Royals': 0,
-        'Sunrisers Hyderabad': 0,
-        'Punjab Kings': 0,
-        'Lucknow Super Giants': 0,
-        'Gujarat Titans': 0,
-    }
-    completed_matches = df[df['Result'].notnull()]
-    for _, match in completed_matches.iterrows():
-        result = match['Result']
-        if result == 'TIE':
-            points_table[match['Home Team']] += 1
-            points_table[match['Away Team']] += 1
-        elif result in points_table:
-            points_table[result] += 2
-    # Save current points table to JSON file
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product, repeat
+from engines import PositionTable, ScenarioStore, compile_fixtures, run_vectorized_monte_carlo
+from engines.adaptive import run_adaptive_monte_carlo, simulations_for_width
+from engines.dedup import run_unique_monte_carlo
+from engines.elimination import clinch_report
+from engines.incremental import run_incremental_monte_carlo
+from engines.leverage import LeverageTable, deciding_results
+from engines.metrics import metrics_for
+from engines.planner import plan_run, run_plan
+from engines.ratings import fit_bradley_terry
+from engines.report import write_html_report
+from engines.scenario_file import save_scenarios
+from engines.schedule import load_schedule, schedule_columns, schedule_points, upcoming_fixtures
+from engines.thresholds import PointsHistogram, parse_thresholds
+from engines.what_if import run_what_ifs
+
+# Current points table, also saved to JSON for expected_points_table.py
+def save_points_table(schedule):
+    points_table = dict(zip(schedule.teams, schedule_points(schedule).tolist()))
     sorted_points = dict(sorted(points_table.items(), key=lambda x: x[1], reverse=True))
     with open('current_points_table.json', 'w') as f:
         json.dump(sorted_points, f, indent=4)
     print("Current points table saved to current_points_table.json")
-    if upcoming_matches.empty:
-        print("No matches left for simulating.")
-        return None, None
-    return upcoming_matches, points_table
+    return points_table
 
 # Simulate using all combinations (if match count is low)
 def run_all_combinations(matches, base_points, qualifying_points):
     qualification_counts = defaultdict(int)
-    team_scenarios = defaultdict(list)
+    fixtures = compile_fixtures(matches, base_points)
+    team_scenarios = ScenarioStore(fixtures, qualifying_points)
+    all_outcomes = []
+    all_points = []
 
     match_list = list(matches.iterrows())
     total_combinations = 2 ** len(match_list)
@@ -53,7 +46,6 @@ def run_all_combinations(matches, base_points, qualifying_points):
 
     for sim_num, outcomes in enumerate(product(['Home', 'Away'], repeat=len(match_list))):
         sim_points = base_points.copy()
-        game_results = []
 
         for (idx, match), outcome in zip(match_list, outcomes):
             home_team = match['Home Team']
@@ -61,23 +53,20 @@ def run_all_combinations(matches, base_points, qualifying_points):
 
             if outcome == 'Home':
                 sim_points[home_team] += 2
-                winner = home_team
             else:
                 sim_points[away_team] += 2
-                winner = away_team
-
-            game_results.append(f"{home_team} vs {away_team}, Winner predicted: {winner}")
 
         # Now check qualification
         qualified_teams = [team for team, points in sim_points.items() if points >= qualifying_points]
 
         for team in qualified_teams:
             qualification_counts[team] += 1
-            team_scenarios[team].append({
-                'Simulation Number': sim_num,
-                'Points': sim_points[team],
-                'Game Results': game_results
-            })
+
+        all_outcomes.append([outcome == 'Home' for outcome in outcomes])
+        all_points.append([sim_points[team] for team in fixtures.teams])
+
+    team_scenarios.add_batch(np.array(all_outcomes, dtype=bool).reshape(total_combinations, -1),
+                             np.array(all_points))
 
     qualification_percentages = {
         team: (count / total_combinations) * 100
@@ -89,50 +78,52 @@ def run_all_combinations(matches, base_points, qualifying_points):
 # Simulate using random seeds (Monte Carlo fallback for large n)
 def simulate_tournament_with_results(matches, base_points, seed):
     points = base_points.copy()
-    game_results = []
-    random.seed(seed)
+    home_wins = []
+    # A private generator gives the same draws as seeding the global one, but is safe in worker processes
+    rng = random.Random(seed)
 
     for _, match in matches.iterrows():
         home_team = match['Home Team']
         away_team = match['Away Team']
-        result = random.choice(['Home', 'Away'])
+        result = rng.choice(['Home', 'Away'])
 
         if result == 'Home':
             points[home_team] += 2
-            winner = home_team
         else:
             points[away_team] += 2
-            winner = away_team
 
-        game_results.append(f"{home_team} vs {away_team}, Winner predicted: {winner}")
+        home_wins.append(result == 'Home')
 
-    return points, game_results
+    return points, home_wins
 
-def get_game_results_for_simulation(matches):
-    results = []
-    for _, match in matches.iterrows():
-        home_team = match['Home Team']
-        away_team = match['Away Team']
-        result = random.choice(['Home', 'Away'])
-        winner = home_team if result == 'Home' else away_team
-        results.append(f"{home_team} vs {away_team}, Winner predicted: {winner}")
-    return results
+# Simulations [start, stop); each is seeded by its own number, so ranges can run in any process
+def simulate_range(matches, base_points, start, stop):
+    return [simulate_tournament_with_results(matches, base_points, sim_num) for sim_num in range(start, stop)]
 
-def run_monte_carlo(matches, base_points, qualifying_points, simulations=50000):
+def run_monte_carlo(matches, base_points, qualifying_points, simulations=50000, workers=1):
     qualification_counts = defaultdict(int)
-    team_scenarios = defaultdict(list)
-    for sim_num in range(simulations):
-        sim_points, game_results = simulate_tournament_with_results(matches, base_points, sim_num)
-        #game_results = get_game_results_for_simulation(matches)
+    fixtures = compile_fixtures(matches, base_points)
+    team_scenarios = ScenarioStore(fixtures, qualifying_points)
+    all_outcomes = []
+    all_points = []
+
+    if workers > 1:
+        bounds = [simulations * i // workers for i in range(workers + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = pool.map(simulate_range, repeat(matches), repeat(base_points), bounds[:-1], bounds[1:])
+            results = [result for chunk in chunks for result in chunk]
+    else:
+        results = simulate_range(matches, base_points, 0, simulations)
+
+    for sim_points, home_wins in results:
         # Now check qualification
         qualified_teams = [team for team, points in sim_points.items() if points >= qualifying_points]
         for team in qualified_teams:
             qualification_counts[team] += 1
-            team_scenarios[team].append({
-                'Simulation Number': sim_num,
-                'Points': sim_points[team],
-                'Game Results': game_results
-            })
+        all_outcomes.append(home_wins)
+        all_points.append([sim_points[team] for team in fixtures.teams])
+    team_scenarios.add_batch(np.array(all_outcomes, dtype=bool).reshape(simulations, -1),
+                             np.array(all_points))
     qualification_percentages = {
         team: (count / simulations) * 100
         for team, count in qualification_counts.items()
@@ -148,95 +139,345 @@ def save_qualifying_scenarios_to_csv(team_scenarios, team_name, file_name, quali
         writer = csv.writer(file)
         writer.writerow(['Simulation Number', 'Match', 'Winner'])
 
-        for scenario in team_scenarios[team_name]:
-            if scenario['Points'] < qualifying_points:
+        for simulation_num, points, game_results in team_scenarios.qualifying_scenarios(team_name):
+            if points < qualifying_points:
                 continue  # skip non-qualifying ones
 
-            simulation_num = scenario['Simulation Number']
-            game_results = scenario['Game Results']
-            for match_result in game_results:
-                match_info = match_result.split(', Winner predicted: ')
-                match = match_info[0].strip()
-                winner = match_info[1].strip()
+            for match, winner in game_results:
                 writer.writerow([simulation_num, match, winner])
 
     print(f"Qualifying scenarios for {team_name} (with ≥ {qualifying_points} points) saved to {file_name}")
 
 
 def save_all_simulations_to_csv(team_scenarios, file_name):
-    # Use a set to track already saved simulation numbers
-    seen_simulations = set()
-
     with open(file_name, mode='w', newline='') as file:
         writer = csv.writer(file)
         writer.writerow(['Simulation Number', 'Match', 'Winner'])
 
-        for scenarios in team_scenarios.values():
-            for scenario in scenarios:
-                sim_num = scenario['Simulation Number']
+        # Each simulation is stored once, however many teams qualified in it
+        for sim_num, game_results in team_scenarios.qualifying_simulations():
+            for match, winner in game_results:
+                writer.writerow([sim_num, match, winner])
 
-                if sim_num in seen_simulations:
-                    continue  # already saved this simulation
+    print(f"All unique simulations saved to {file_name}")
 
-                seen_simulations.add(sim_num)
+def print_position_table(positions):
+    from tabulate import tabulate
 
-                for match_result in scenario['Game Results']:
-                    match_info = match_result.split(', Winner predicted: ')
-                    match = match_info[0].strip()
-                    winner = match_info[1].strip()
-                    writer.writerow([sim_num, match, winner])
+    table_data = []
+    top = positions.top
+    position_percentages = positions.position_percentages()
+    for team, (top_split, outright, shared) in sorted(positions.top_percentages().items(), key=lambda x: x[1][0], reverse=True):
+        position_cells = [f"{percentage:.1f}%" for percentage in position_percentages[team]]
+        table_data.append([team] + position_cells + [f"{top_split:.2f}%", f"{outright:.2f}%", f"{shared:.2f}%"])
 
-    print(f"All unique simulations saved to {file_name}")
+    headers = ["Team"] + [str(position) for position in range(1, len(positions.fixtures.teams) + 1)]
+    headers += [f"Top {top}", f"Top {top} outright", f"Level at {top}th"]
+    print("\nFinal Position Probabilities (teams level on points share their positions equally):")
+    print(tabulate(table_data, headers=headers, tablefmt="pretty"))
+
+def print_top_table(top_percentages, top=4):
+    from tabulate import tabulate
+
+    table_data = []
+    for team, (top_split, outright, shared) in sorted(top_percentages.items(), key=lambda x: x[1][0], reverse=True):
+        table_data.append([team, f"{top_split:.2f}%", f"{outright:.2f}%", f"{shared:.2f}%"])
+
+    print(f"\nExact Top {top} Probabilities (teams level on points at the cut share the places left):")
+    print(tabulate(table_data, headers=["Team", f"Top {top}", f"Top {top} outright", f"Level at {top}th"], tablefmt="pretty"))
+
+def print_leverage_table(leverage, shown=3):
+    from tabulate import tabulate
+
+    match_numbers = leverage.fixtures.match_numbers
+    table_data = []
+    for team in leverage.fixtures.teams:
+        cells = [f"Match {match_numbers[match]}: {winner} ({abs(home - away):.1f}%)"
+                 for match, _, home, away, winner in leverage.ranking(team)[:shown]]
+        table_data.append([team] + cells)
+
+    print(f"\nResults that move each team's Top {leverage.top} chances most (wanted winner, swing between the two results):")
+    print(tabulate(table_data, headers=["Team"] + [f"#{rank}" for rank in range(1, shown + 1)], tablefmt="pretty"))
+
+def print_team_leverage(leverage, team_name):
+    from tabulate import tabulate
+
+    table_data = [[match, winner, f"{home:.2f}%", f"{away:.2f}%"] for _, match, home, away, winner in leverage.ranking(team_name)]
+    print(f"\nTop {leverage.top} chances of {team_name} by remaining result:")
+    print(tabulate(table_data, headers=["Match", "Wants", "If home wins", "If away wins"], tablefmt="pretty"))
+
+    deciding = deciding_results(leverage, team_name)
+    for key, outcome in (('guarantee', 'guarantee'), ('rule_out', 'rule out')):
+        results = deciding[key]
+        if results is None:
+            print(f"No set of results can {outcome} a Top {leverage.top} finish.")
+        elif not results:
+            print(f"Nothing more is needed to {outcome} a Top {leverage.top} finish.")
+        else:
+            print(f"Results that {outcome} a Top {leverage.top} finish: "
+                  + "; ".join(f"{winner} win {match}" for match, winner in results))
+
+def print_what_if_table(names, results, qualifying_points):
+    from tabulate import tabulate
+
+    table_data = []
+    for team in results[0][1].fixtures.teams:
+        row = [team]
+        for percentages, positions in results:
+            top_split = positions.top_percentages()[team][0]
+            row.append(f"{percentages.get(team, 0):.1f}% / {top_split:.1f}%")
+        table_data.append(row)
+
+    print(f"\nWhat-if scenarios (≥ {qualifying_points} points / Top {results[0][1].top}):")
+    print(tabulate(table_data, headers=["Team"] + names, tablefmt="pretty"))
+
+def print_threshold_table(histogram, thresholds):
+    from tabulate import tabulate
+
+    percentages = histogram.threshold_percentages(thresholds)
+    table_data = []
+    for team, row in sorted(percentages.items(), key=lambda x: list(x[1].values()), reverse=True):
+        table_data.append([team] + [f"{row[threshold]:.2f}%" for threshold in thresholds])
+
+    print("\nProbability of finishing on at least each points total:")
+    print(tabulate(table_data, headers=["Team"] + [f"≥ {threshold}" for threshold in thresholds], tablefmt="pretty"))
+
+def print_clinch_table(report, top=4):
+    from tabulate import tabulate
+
+    table_data = []
+    for team, row in sorted(report.items(), key=lambda x: x[1]['max_points'], reverse=True):
+        clinch = '-' if row['clinch_number'] is None else row['clinch_number']
+        elimination = '-' if row['elimination_number'] is None else row['elimination_number']
+        table_data.append([team, row['status'], row['min_points'], row['max_points'], clinch, elimination])
+
+    print(f"\nTop {top} Clinch/Elimination Status:")
+    print(tabulate(table_data, headers=["Team", "Status", "Min Points", "Max Points", "Wins to Clinch", "Losses to Elimination"], tablefmt="pretty"))
+
+# The planner picks the fastest exact engines estimated to finish within this many seconds,
+# adding position tables, leverage and kept scenarios when it can afford them; otherwise Monte Carlo
+EXACT_TIME_BUDGET = 10
+# Phase timings and counters as one JSON line per run: None for off, "-" for stdout, or a file to append to
+METRICS_OUTPUT = None
+# Phases also run under cProfile when metrics are on, e.g. ("simulate",)
+PROFILE_PHASES = ()
+# Master seed for Monte Carlo runs; the same seed gives the same results on any number of cores
+SIMULATION_SEED = 0
+# Adaptive runs stop once every 95% interval is narrower than this (as a fraction), or after this many seconds
+ADAPTIVE_TARGET_WIDTH = 0.01
+ADAPTIVE_TIME_BUDGET = 120
+# Planner engines a given number of simulations can run on
+SAMPLING_ENGINES = ['vectorized', 'parallel']
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Season being simulated
+SCHEDULE_FILE = os.path.join(BASE_DIR, "ipl_2025_schedule.csv")
+# Earlier seasons used, with the current schedule, to fit team ratings
+RATING_HISTORY_FILES = [os.path.join(BASE_DIR, "ipl_2024_schedule.csv")]
 
 # Main logic
 def main():
-    file_path = "C:\\Kani_Personal\\Cricket_Study\\ipl_simulation\\ipl_2025_schedule.csv"
-    qualifying_points = int(input("Enter the qualifying points (e.g., 16): "))
-    matches, base_points = load_data(file_path)
-
-    if matches is None:
+    file_path = SCHEDULE_FILE
+    metrics = metrics_for(METRICS_OUTPUT, PROFILE_PHASES)
+    # Several thresholds ("14-17" or "14,16") are answered from one run; the first drives the tables below
+    while True:
+        try:
+            thresholds = parse_thresholds(
+                input("Enter the qualifying points (e.g., 16, or 14-17 to compare several): "))
+            break
+        except ValueError as error:
+            print(f"Invalid qualifying points: {error}")
+    qualifying_points = thresholds[0]
+    with metrics.phase('load'):
+        schedule = load_schedule(file_path)
+        save_points_table(schedule)
+        fixtures = upcoming_fixtures(schedule)
+
+    match_count = len(fixtures.home)
+    if match_count == 0:
+        print("No matches left for simulating.")
         return
-
-    match_count = len(matches)
     print(f"\nSimulating {match_count} matches...\n")
 
+    with metrics.phase('clinch'):
+        clinch = clinch_report(fixtures)
+    print_clinch_table(clinch)
+
+    probabilities = None
+    use_ratings = input("Use team ratings for match win probabilities instead of 50/50? (yes/no): ").strip().lower()
+    if use_ratings == 'yes':
+        with metrics.phase('ratings'):
+            history = [schedule_columns(load_schedule(path)) for path in RATING_HISTORY_FILES]
+            history.append(schedule_columns(schedule))
+            probabilities = fit_bradley_terry(history).probabilities(fixtures)
+    positions = PositionTable(fixtures)
+    leverage = LeverageTable(fixtures, top=positions.top)
+    histogram = PointsHistogram(fixtures)
+    sweep = len(thresholds) > 1
+    collectors = [positions, leverage, histogram] if sweep else [positions, leverage]
     start_time = time.time()
 
-    if match_count <= 15:
-        print("Using all combinations method...")
-        qualification_percentages, team_scenarios = run_all_combinations(matches, base_points, qualifying_points)
+    # The planner picks the engines; on sampled plans the prompts can override its choice
+    required = {'qualification', 'top'} | ({'thresholds'} if sweep else set())
+    plan = plan_run(fixtures, required, optional=('positions', 'leverage', 'scenarios'),
+                    precision=ADAPTIVE_TARGET_WIDTH, workers=os.cpu_count(), time_budget=EXACT_TIME_BUDGET)
+    print(f"Engine: {plan.reason}.")
+    engine = 'plan'
+    if not plan.exact:
+        override = input("Press Enter to run this plan, or enter a number of simulations instead "
+                         "(0 for exact per-team probabilities, 'adaptive' to stop at ±0.5% precision): ")
+        override = override.strip().lower()
+        if override == 'adaptive':
+            engine = 'adaptive'
+        elif override == '0':
+            # Exact marginals answer the threshold question directly but give no top-k split
+            plan = plan_run(fixtures, required - {'top'}, engines=['exact_marginals'])
+            print(f"Engine: {plan.reason}.")
+        elif override:
+            simulations = int(override)
+            if input("Count only unique scenarios? (yes/no): ").strip().lower() == 'yes':
+                engine = 'unique'
+            elif input("Reuse simulations cached by earlier runs? (yes/no): ").strip().lower() == 'yes':
+                engine = 'cached'
+            else:
+                plan = plan_run(fixtures, required, optional=('positions', 'leverage', 'scenarios'),
+                                simulations=simulations, workers=os.cpu_count(), engines=SAMPLING_ENGINES)
+                print(f"Engine: {plan.reason}.")
+
+    top_percentages = None
+    if engine == 'plan':
+        with metrics.phase('simulate'):
+            result = run_plan(plan, fixtures, qualifying_points, seed=SIMULATION_SEED, workers=os.cpu_count(),
+                              probabilities=probabilities)
+        if any(name == 'exact_enumeration' for name, _ in plan.engines):
+            metrics.count('simulations', 2 ** match_count)
+        elif not plan.exact:
+            metrics.count('simulations', plan.simulations)
+        qualification_percentages, team_scenarios, top_percentages = result.qualification, result.store, result.top
+        positions = result.positions or positions
+        leverage = result.leverage or leverage
+        histogram = result.histogram or histogram
+        if team_scenarios is None or result.leverage is None:
+            # Too many matches to keep every outcome: scenarios and leverage come from a sample instead
+            simulations = simulations_for_width(ADAPTIVE_TARGET_WIDTH)
+            with metrics.phase('sample'):
+                _, sampled = run_vectorized_monte_carlo(
+                    fixtures, qualifying_points, simulations, seed=SIMULATION_SEED, keep_scenarios=True,
+                    collectors=[leverage] if result.leverage is None else [], probabilities=probabilities)
+            metrics.count('simulations', simulations)
+            missing = [name for name, value in (('scenarios', team_scenarios), ('leverage', result.leverage))
+                       if value is None]
+            team_scenarios = team_scenarios if team_scenarios is not None else sampled
+            print(f"{' and '.join(missing).capitalize()} come from {simulations:,} separately sampled simulations.")
+    elif engine == 'adaptive':
+        # Adaptive stopping: run batches until every team's 95% interval is narrow enough
+        with metrics.phase('simulate'):
+            qualification_percentages, team_scenarios, summary = run_adaptive_monte_carlo(
+                fixtures, qualifying_points, target_width=ADAPTIVE_TARGET_WIDTH, time_budget=ADAPTIVE_TIME_BUDGET,
+                seed=SIMULATION_SEED, keep_scenarios=True, collectors=collectors, probabilities=probabilities)
+        metrics.count('simulations', summary['simulations'])
+        print(f"Stopped on {summary['stopped']} after {summary['simulations']:,} simulations; "
+              f"widest 95% interval is {summary['max_width']:.2f}%.")
+    elif engine == 'unique':
+        # Duplicate outcome vectors are skipped, so every kept scenario is distinct
+        with metrics.phase('simulate'):
+            qualification_percentages, team_scenarios, summary = run_unique_monte_carlo(
+                fixtures, qualifying_points, simulations, seed=SIMULATION_SEED,
+                keep_scenarios=True, collectors=collectors, probabilities=probabilities)
+        metrics.count('simulations', summary['draws'])
+        print(f"Kept {summary['distinct']:,} distinct scenarios out of {summary['draws']:,} draws.")
     else:
-        print("Too many matches left. Falling back to Monte Carlo simulations.")
-        num_simulations = int(input("Enter the number of simulations: "))
-        qualification_percentages, team_scenarios = run_monte_carlo(matches, base_points, qualifying_points, num_simulations)
+        # Samples cached by earlier runs are reused if they agree with results entered since
+        with metrics.phase('simulate'):
+            qualification_percentages, team_scenarios, summary = run_incremental_monte_carlo(
+                schedule_columns(schedule), fixtures, qualifying_points, simulations,
+                seed=SIMULATION_SEED, workers=os.cpu_count(), keep_scenarios=True, collectors=collectors,
+                probabilities=probabilities)
+        metrics.count('simulations', summary['drawn'])
+        if summary['discarded']:
+            print(f"Cached simulations discarded: {summary['discarded']}.")
+        reweighted = (f" (worth {summary['effective']:,.0f} after reweighting to the current ratings)"
+                      if summary['effective'] != summary['reused'] else "")
+        print(f"Reused {summary['reused']:,} cached simulations{reweighted}, drew {summary['drawn']:,} new ones.")
 
     end_time = time.time()
 
+    if team_scenarios is None:
+        team_scenarios = ScenarioStore(fixtures, qualifying_points)
+    metrics.count('scenarios_stored', len(team_scenarios))
+
     # Display
     table_data = []
     for team, percentage in sorted(qualification_percentages.items(), key=lambda x: x[1], reverse=True):
         table_data.append([team, f"{percentage:.2f}%"])
 
+    from tabulate import tabulate
+
     print(f"\nQualification Probabilities (Teams with ≥ {qualifying_points} points):")
     print(tabulate(table_data, headers=["Team", "Qualification Probability"], tablefmt="pretty"))
+    if sweep:
+        print_threshold_table(histogram, thresholds)
+    if positions.total:
+        print_position_table(positions)
+    if leverage.total:
+        print_leverage_table(leverage)
+    if not positions.total and top_percentages is not None:
+        print_top_table(top_percentages, positions.top)
     print(f"\nCompleted in {end_time - start_time:.2f} seconds.\n")
 
-    # Save results
-    save_all_simulations = input("Do you want to store all simulations to a CSV file? (yes/no): ").strip().lower()
-    if save_all_simulations == 'yes':
-        file_name = input("Enter the name of the file to save simulations (e.g., all_simulations.csv): ").strip()
-        save_all_simulations_to_csv(team_scenarios, file_name)
+    # What-ifs: [{"name": "RCB beat DC", "results": {"62": "Royal Challengers Bengaluru"}}, ...]
+    what_if = input("Do you want to evaluate what-if scenarios from a JSON file? (yes/no): ").strip().lower()
+    if what_if == 'yes':
+        file_name = input("Enter the name of the what-if file (e.g., what_if.json): ").strip()
+        with open(file_name) as f:
+            what_ifs = json.load(f)
+        with metrics.phase('what_if'):
+            results = run_what_ifs(fixtures, qualifying_points, [row['results'] for row in what_ifs],
+                                   seed=SIMULATION_SEED, probabilities=probabilities)
+        metrics.count('what_ifs', len(what_ifs))
+        print_what_if_table([row['name'] for row in what_ifs], results, qualifying_points)
+
+    # Save results; exports are only offered when this run kept scenarios
+    if not len(team_scenarios):
+        print("This run kept no scenarios, so there are no simulations to save or export.")
+    elif input("Do you want to store all simulations to a file? (yes/no): ").strip().lower() == 'yes':
+        file_name = input("Enter the name of the file to save simulations "
+                          "(e.g., all_simulations.sims, or all_simulations.csv for text): ").strip()
+        with metrics.phase('export'):
+            if file_name.endswith('.csv'):
+                save_all_simulations_to_csv(team_scenarios, file_name)
+            else:
+                # Binary scenario file: one bulk write, memory-mapped by match.py and the other tools
+                save_scenarios(team_scenarios, file_name)
+                print(f"All {len(team_scenarios):,} simulations saved to {file_name}")
+        metrics.count_file(file_name)
+
+    if len(team_scenarios):
+        save_report = input("Do you want an HTML report of the simulations? (yes/no): ").strip().lower()
+        if save_report == 'yes':
+            file_name = input("Enter the name of the report file (e.g., simulated.html): ").strip()
+            with metrics.phase('report'):
+                write_html_report(team_scenarios, file_name, positions=positions if positions.total else None)
+            metrics.count_file(file_name)
+            print(f"Report saved to {file_name}")
 
     specific_team = input("Do you want to see the qualifying scenarios for a specific team? (yes/no): ").strip().lower()
     if specific_team == 'yes':
         team_name = input("Enter the team name (e.g., Chennai Super Kings): ").strip()
-        if team_name in team_scenarios:
+        if leverage.total and team_name in fixtures.teams:
+            print_team_leverage(leverage, team_name)
+        if not len(team_scenarios):
+            print("This run kept no scenarios to export.")
+        elif team_name in team_scenarios:
             save_file_input = input(f"Do you want to save the qualifying scenarios for {team_name} to a file? (yes/no): ").strip().lower()
             if save_file_input == 'yes':
                 file_name = input("Enter the name of the file to save results (e.g., qualifying_scenarios.csv): ").strip()
-                save_qualifying_scenarios_to_csv(team_scenarios, team_name, file_name, qualifying_points)
+                with metrics.phase('export'):
+                    save_qualifying_scenarios_to_csv(team_scenarios, team_name, file_name, qualifying_points)
+                metrics.count_file(file_name)
         else:
             print(f"No qualifying scenarios found for {team_name}.")
 
+    metrics.emit(METRICS_OUTPUT)
+
 if __name__ == "__main__":
     main()
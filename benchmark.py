@@ -0,0 +1,260 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import app
+import working
+from engines import run_exact_marginals, run_parallel_monte_carlo, run_vectorized_monte_carlo
+from engines.dedup import run_unique_monte_carlo
+from engines.gray_code import run_gray_code_enumeration
+from engines.planner import SCENARIO_MATCH_LIMIT, plan_run, run_plan
+from engines.scenario_file import export_csv, save_scenarios
+from engines.schedule import (AWAY_WIN, HOME_WIN, PENDING, compile_schedule, load_schedule, schedule_frame,
+                              schedule_points, upcoming_fixtures)
+from engines.state_dp import run_state_dp
+
+# Every engine is run on every case it can handle in reasonable time, each run in
+# a fresh process so its peak RSS is its own. Results go to benchmarks/<commit>.json;
+# with BASELINE_FILE set, wall times are compared against an earlier run.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, "benchmarks")
+BASELINE_FILE = None  # e.g. os.path.join(OUTPUT_DIR, "5250034.json")
+QUALIFYING_POINTS = 16
+SEED = 0
+
+# Real seasons as they stood with N matches left, plus synthetic leagues
+SCHEDULE_FILES = [os.path.join(BASE_DIR, "ipl_2024_schedule.csv"), os.path.join(BASE_DIR, "ipl_2025_schedule.csv")]
+REMAINING_MATCHES = [12, 20, 30, 60]
+SYNTHETIC_LEAGUES = [(14, 40), (20, 80)]  # (teams, matches left) in a double round robin
+
+# Simulation counts: the vectorised engines and the pure-Python ones differ by orders of magnitude
+SIMULATIONS = 200_000
+LEGACY_SIMULATIONS = 1_000
+# Tracemalloc slows pure-Python code several times over, so the peak is taken from a second run
+MEASURE_TRACEMALLOC = True
+MEASURE_EXPORT = True
+# Request the planner is benchmarked on
+PLANNER_PRECISION = 0.01
+PLANNER_TIME_BUDGET = 10
+
+
+# The season as it stood with `remaining` matches left: later results are reopened,
+# and matches still to be played before that point are given seeded random results
+def season_at(schedule, remaining, seed=SEED):
+    order = np.argsort(schedule.match_numbers, kind='stable')
+    result = schedule.result.copy()
+    settled, reopened = order[:max(len(order) - remaining, 0)], order[max(len(order) - remaining, 0):]
+    unplayed = settled[result[settled] == PENDING]
+    result[unplayed] = np.random.default_rng(seed).choice([HOME_WIN, AWAY_WIN], size=len(unplayed))
+    result[reopened] = PENDING
+    return schedule._replace(result=result)
+
+
+# Double round robin for `team_count` teams with random results for all but `remaining` matches
+def synthetic_schedule(team_count, remaining, seed=SEED):
+    rng = random.Random(seed)
+    teams = [f"Team {i + 1}" for i in range(team_count)]
+    pairs = [(home, away) for home in teams for away in teams if home != away]
+    rng.shuffle(pairs)
+    rows = []
+    for number, (home, away) in enumerate(pairs, start=1):
+        played = number <= len(pairs) - remaining
+        rows.append({'Match Number': number, 'Home Team': home, 'Away Team': away,
+                     'Result': rng.choice([home, away]) if played else ''})
+    return compile_schedule(rows)
+
+
+def benchmark_cases():
+    cases = []
+    for path in SCHEDULE_FILES:
+        schedule = load_schedule(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        for remaining in REMAINING_MATCHES:
+            cases.append((f"{name} last {remaining}", season_at(schedule, remaining)))
+    for team_count, remaining in SYNTHETIC_LEAGUES:
+        cases.append((f"synthetic {team_count} teams, {remaining} left", synthetic_schedule(team_count, remaining)))
+    return cases
+
+
+def _legacy_inputs(schedule):
+    base_points = dict(zip(schedule.teams, schedule_points(schedule).tolist()))
+    return schedule_frame(schedule, schedule.result == PENDING), base_points
+
+
+# Each engine: (name, largest number of matches it is run on, run(schedule) -> (scenarios evaluated, result to export))
+def _app_all_combinations(schedule):
+    _, store = app.run_all_combinations(*_legacy_inputs(schedule), QUALIFYING_POINTS)
+    return len(store), store
+
+
+def _app_monte_carlo(schedule):
+    _, store = app.run_monte_carlo(*_legacy_inputs(schedule), QUALIFYING_POINTS, LEGACY_SIMULATIONS)
+    return LEGACY_SIMULATIONS, store
+
+
+def _working_monte_carlo(schedule):
+    _, store = working.run_monte_carlo(*_legacy_inputs(schedule), QUALIFYING_POINTS, SIMULATIONS, seed=SEED)
+    return SIMULATIONS, store
+
+
+def _vectorized(schedule):
+    _, store = run_vectorized_monte_carlo(upcoming_fixtures(schedule), QUALIFYING_POINTS, SIMULATIONS, seed=SEED,
+                                          keep_scenarios=True)
+    return SIMULATIONS, store
+
+
+def _parallel(schedule):
+    _, store = run_parallel_monte_carlo(upcoming_fixtures(schedule), QUALIFYING_POINTS, SIMULATIONS, seed=SEED,
+                                        keep_scenarios=True)
+    return SIMULATIONS, store
+
+
+def _unique(schedule):
+    _, store, summary = run_unique_monte_carlo(upcoming_fixtures(schedule), QUALIFYING_POINTS, SIMULATIONS,
+                                               seed=SEED, keep_scenarios=True)
+    return summary['draws'], store
+
+
+def _gray_code(schedule):
+    fixtures = upcoming_fixtures(schedule)
+    _, store = run_gray_code_enumeration(fixtures, QUALIFYING_POINTS, workers=os.cpu_count(),
+                                         keep_scenarios=len(fixtures.home) <= SCENARIO_MATCH_LIMIT)
+    return 2 ** len(fixtures.home), store
+
+
+def _exact_marginals(schedule):
+    run_exact_marginals(upcoming_fixtures(schedule), QUALIFYING_POINTS)
+    return None, None
+
+
+def _state_dp(schedule):
+    run_state_dp(upcoming_fixtures(schedule))
+    return None, None
+
+
+# Whatever the planner picks for qualification and top-4 odds at ±0.5%, within the time budget
+def _planned(schedule):
+    fixtures = upcoming_fixtures(schedule)
+    plan = plan_run(fixtures, {'qualification', 'top'}, precision=PLANNER_PRECISION, workers=os.cpu_count(),
+                    time_budget=PLANNER_TIME_BUDGET)
+    run_plan(plan, fixtures, QUALIFYING_POINTS, seed=SEED, workers=os.cpu_count())
+    return plan.simulations, None
+
+
+ENGINES = [
+    ('app.run_all_combinations', 14, _app_all_combinations),
+    ('app.run_monte_carlo', 30, _app_monte_carlo),
+    ('working.run_monte_carlo', None, _working_monte_carlo),
+    ('vectorized', None, _vectorized),
+    ('parallel', None, _parallel),
+    ('unique', None, _unique),
+    ('gray_code', 26, _gray_code),
+    ('exact_marginals', None, _exact_marginals),
+    ('state_dp', 30, _state_dp),
+    ('planner', None, _planned),
+]
+
+
+# Time writing a run's scenarios: the binary file and the CSV export
+def _export_cost(store):
+    costs = {}
+    with tempfile.TemporaryDirectory() as directory:
+        exports = [('sims', 'scenarios.sims', lambda path: save_scenarios(store, path)),
+                   ('csv', 'scenarios.csv', lambda path: export_csv(store, path))]
+        for name, file_name, export in exports:
+            path = os.path.join(directory, file_name)
+            start = time.perf_counter()
+            export(path)
+            costs[name] = {'seconds': time.perf_counter() - start, 'bytes': os.path.getsize(path)}
+    return costs
+
+
+# One engine on one case, run in a child process
+def _measure(run, schedule):
+    row = {'rss_start_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        scenarios, result = run(schedule)
+        row['wall_seconds'] = time.perf_counter() - start
+    row['scenarios'] = scenarios
+    row['scenarios_per_second'] = None if scenarios is None else scenarios / row['wall_seconds']
+    if MEASURE_EXPORT and result is not None and len(result):
+        row['export'] = _export_cost(result)
+    del result
+
+    if MEASURE_TRACEMALLOC:
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(schedule)
+        row['tracemalloc_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    row['rss_peak_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return row
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_benchmarks():
+    results = []
+    for case, schedule in benchmark_cases():
+        match_count = int((schedule.result == PENDING).sum())
+        for engine, limit, run in ENGINES:
+            if limit is not None and match_count > limit:
+                continue
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                row = pool.submit(_measure, run, schedule).result()
+            row = {'case': case, 'engine': engine, 'teams': len(schedule.teams), 'matches': match_count, **row}
+            results.append(row)
+            rate = '' if row['scenarios_per_second'] is None else f", {row['scenarios_per_second']:,.0f} scenarios/s"
+            print(f"{case:<36} {engine:<26} {row['wall_seconds']:8.3f}s{rate}")
+    return {
+        'commit': _commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+
+# Wall-time ratio (current / baseline) for every case and engine present in both runs
+def compare(baseline, current):
+    before = {(row['case'], row['engine']): row['wall_seconds'] for row in baseline['results']}
+    print(f"\nWall time against {baseline['commit']} (ratio > 1 is slower):")
+    for row in current['results']:
+        key = (row['case'], row['engine'])
+        if key in before and before[key] > 0:
+            print(f"{row['case']:<36} {row['engine']:<26} {row['wall_seconds'] / before[key]:6.2f}x")
+
+
+def main():
+    report = run_benchmarks()
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, f"{report['commit']}.json")
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark results saved to {output_path}")
+    if BASELINE_FILE is not None:
+        with open(BASELINE_FILE) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,47 @@
-import pandas as pd
-from collections import defaultdict
+import csv
+import hashlib
+from itertools import groupby
 
-# Load your all.csv
-df = pd.read_csv("csk.csv")
+import numpy as np
 
-# Group by Simulation Number
-simulation_groups = df.groupby("Simulation Number")
+from engines.dedup import DuplicateCounter, packed_keys
+from engines.scenario_file import open_scenarios
 
-# Create a dictionary where key = tuple of match results, value = list of simulation numbers with that result
-result_map = defaultdict(list)
+# A scenario file (.sims) is read through a memory map; a CSV export is streamed row by row
+SIMULATION_FILE = "all.sims"
+# Set to True for a HyperLogLog estimate of the unique count in fixed memory
+APPROXIMATE = False
+BATCH_SIZE = 1 << 16
 
-for sim_number, group in simulation_groups:
-    results = tuple(group["Winner"].tolist())  # tuple ensures order
-    result_map[results].append(sim_number)
+# One 64-bit key per simulation from its ordered list of winners
+def simulation_keys(rows):
+    for sim_number, group in groupby(rows, key=lambda row: row["Simulation Number"]):
+        digest = hashlib.blake2b(digest_size=8)
+        for row in group:
+            digest.update(row["Winner"].encode())
+            digest.update(b"\0")
+        yield int.from_bytes(digest.digest(), "little")
 
-# Count total duplicate simulations (excluding the first occurrence in each group)
-duplicate_sim_count = sum(len(sims) - 1 for sims in result_map.values() if len(sims) > 1)
+counter = DuplicateCounter(approximate=APPROXIMATE)
 
-# Number of unique sets that were duplicated
-distinct_duplicates = sum(1 for sims in result_map.values() if len(sims) > 1)
+if SIMULATION_FILE.endswith(".sims"):
+    bits = open_scenarios(SIMULATION_FILE).bits
+    for start in range(0, len(bits), BATCH_SIZE):
+        counter.add_keys(packed_keys(bits[start:start + BATCH_SIZE]))
+else:
+    # Rows of a simulation are contiguous in the CSV export
+    with open(SIMULATION_FILE, newline="") as file:
+        batch = []
+        for key in simulation_keys(csv.DictReader(file)):
+            batch.append(key)
+            if len(batch) == BATCH_SIZE:
+                counter.add_keys(np.array(batch, dtype=np.uint64))
+                batch = []
+        counter.add_keys(np.array(batch, dtype=np.uint64))
 
-print(f"Total simulations: {len(simulation_groups)}")
-print(f"Duplicated simulations (excluding firsts): {duplicate_sim_count}")
-print(f"Number of distinct result sets that were duplicated: {distinct_duplicates}")
-print("Total unique result sets:", len(result_map))
\ No newline at end of file
+summary = counter.summary()
+print(f"Total simulations: {summary['simulations']}")
+print(f"Duplicated simulations (excluding firsts): {summary['duplicates']}")
+if "duplicated_sets" in summary:
+    print(f"Number of distinct result sets that were duplicated: {summary['duplicated_sets']}")
+print("Total unique result sets:", summary['distinct'])
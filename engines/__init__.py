@@ -0,0 +1,6 @@
+from .fixtures import Fixtures, compile_fixtures, final_points
+from .parallel import run_parallel_monte_carlo
+from .points_distribution import run_exact_marginals
+from .positions import PositionTable
+from .scenario_store import ScenarioStore
+from .vectorized import run_vectorized_monte_carlo
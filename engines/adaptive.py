@@ -0,0 +1,131 @@
+import math
+import time
+
+import numpy as np
+
+from .fixtures import away_points, swing_matrix, to_percentages
+from .scenario_store import ScenarioStore
+from .vectorized import simulate_batch
+
+# z for a 95% interval, shared by every engine that turns a width target into a sample count
+Z_95 = 1.959964
+# Unless a batch size is given, the simulations needed in the worst case (p = 0.5)
+# are split into this many batches, so the stopping rule decides the count
+ADAPTIVE_BATCHES = 16
+MIN_BATCH_SIZE = 1 << 10
+
+
+# Monte Carlo simulations for a 95% interval no wider than `width` (a fraction)
+# around probability p, by the normal approximation; p = 0.5 is the worst case.
+# For an array of p, enough for the widest.
+def simulations_for_width(width, p=0.5):
+    p = np.asarray(p, dtype=np.float64)
+    return int(math.ceil(np.max(4 * Z_95 ** 2 * p * (1 - p)) / width ** 2))
+
+
+# Wilson score interval for counts out of n trials (arrays in, arrays out)
+def wilson_interval(counts, n, z=Z_95):
+    p = counts / n
+    denominator = 1 + z ** 2 / n
+    centre = (p + z ** 2 / (2 * n)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return np.clip(centre - half_width, 0, 1), np.clip(centre + half_width, 0, 1)
+
+
+# Regularized incomplete beta I_x(a, b) by Lentz's continued fraction
+def _betainc(a, b, x):
+    if x <= 0 or x >= 1:
+        return float(x >= 1)
+    if x > (a + 1) / (a + b + 2):
+        return 1 - _betainc(b, a, 1 - x)
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)) / a
+    tiny = 1e-300
+    c, d = 1.0, 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 500):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1) < 1e-12:
+            break
+    return front * result
+
+
+# Inverse of I_x(a, b) in x by bisection
+def _beta_quantile(q, a, b):
+    low, high = 0.0, 1.0
+    for _ in range(60):
+        mid = (low + high) / 2
+        if _betainc(a, b, mid) < q:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+# Exact (conservative) Clopper-Pearson interval from beta quantiles
+def clopper_pearson_interval(counts, n, alpha=0.05):
+    lows, highs = [], []
+    for k in np.asarray(counts).tolist():
+        lows.append(0.0 if k == 0 else _beta_quantile(alpha / 2, k, n - k + 1))
+        highs.append(1.0 if k == n else _beta_quantile(1 - alpha / 2, k + 1, n - k))
+    return np.array(lows), np.array(highs)
+
+
+INTERVALS = {'wilson': wilson_interval, 'clopper-pearson': clopper_pearson_interval}
+
+
+# Monte Carlo in batches until every team's 95% interval on its qualification
+# probability is narrower than target_width (or the time budget or simulation
+# cap runs out). Batch i draws from child i of the master seed, the same stream
+# the vectorized engine uses with this batch size.
+def run_adaptive_monte_carlo(fixtures, qualifying_points, target_width=0.01, time_budget=None,
+                             max_simulations=100_000_000, seed=None, interval='wilson',
+                             batch_size=None, keep_scenarios=False, collectors=(),
+                             probabilities=None):
+    interval_fn = INTERVALS[interval]
+    if batch_size is None:
+        batch_size = max(MIN_BATCH_SIZE, math.ceil(simulations_for_width(target_width) / ADAPTIVE_BATCHES))
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    swing = swing_matrix(fixtures)
+    floor = away_points(fixtures)
+
+    store = ScenarioStore(fixtures, qualifying_points) if keep_scenarios else None
+    sinks = list(collectors) + ([store] if store is not None else [])
+    counts = np.zeros(len(fixtures.teams), dtype=np.int64)
+    simulations = 0
+    start_time = time.time()
+
+    while True:
+        size = min(batch_size, max_simulations - simulations)
+        outcomes, points = simulate_batch(fixtures, root.spawn(1)[0], size, swing, floor, probabilities)
+        counts += np.count_nonzero(points >= qualifying_points, axis=0)
+        simulations += size
+        for sink in sinks:
+            sink.add_batch(outcomes, points)
+
+        low, high = interval_fn(counts, simulations)
+        max_width = float((high - low).max())
+        if max_width < target_width:
+            stopped = 'precision'
+        elif time_budget is not None and time.time() - start_time >= time_budget:
+            stopped = 'time'
+        elif simulations >= max_simulations:
+            stopped = 'max_simulations'
+        else:
+            continue
+        break
+
+    summary = {
+        'simulations': simulations,
+        'elapsed': time.time() - start_time,
+        'max_width': max_width * 100,
+        'stopped': stopped,
+        'intervals': {team: (lo * 100, hi * 100) for team, lo, hi in zip(fixtures.teams, low.tolist(), high.tolist())},
+    }
+    return to_percentages(fixtures, counts, simulations), store, summary
@@ -0,0 +1,129 @@
+import numpy as np
+
+from .fixtures import to_percentages
+from .scenario_store import read_simulations_csv
+
+CHUNK_SIZE = 1 << 16
+
+# Number of set bits in every byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+# Points table from every completed result in a schedule (2 for a win, 1 each for a TIE)
+def results_points(schedule, teams):
+    points = dict.fromkeys(teams, 0)
+    for home, away, result in zip(schedule['Home Team'], schedule['Away Team'], schedule['Result']):
+        if result == 'TIE':
+            points[home] += 1
+            points[away] += 1
+        elif result in points:
+            points[result] += 2
+    return points
+
+
+# Load an all-simulations CSV export against `schedule`: the simulated matches
+# are looked up by their "Home vs Away" label and results of every other match
+# set the starting points. Returns the store and the CSV's simulation numbers.
+def load_simulations_csv(path, schedule, qualifying_points):
+    import pandas as pd
+
+    labels = schedule['Home Team'] + ' vs ' + schedule['Away Team']
+    simulated_labels = set(pd.read_csv(path, usecols=['Match'])['Match'].str.strip())
+    unknown = simulated_labels.difference(labels)
+    if unknown:
+        raise ValueError(f"Simulated matches not in schedule: {sorted(unknown)}")
+
+    simulated = labels.isin(simulated_labels).to_numpy()
+    teams = list(dict.fromkeys(schedule['Home Team'].tolist() + schedule['Away Team'].tolist()))
+    base_points = results_points(schedule[~simulated], teams)
+    return read_simulations_csv(path, base_points, qualifying_points, matches=schedule[simulated])
+
+
+# Actual outcome of every fixture as (bits, known): bit 1 = home win. Matches
+# without a result, abandoned or TIE are left out of `known`. Every simulated
+# match number must be in the schedule between the same home and away teams.
+def actual_outcomes(fixtures, schedule):
+    rows = {number: (home, away, result) for number, home, away, result in
+            zip(schedule['Match Number'], schedule['Home Team'], schedule['Away Team'], schedule['Result'])}
+    mismatched = [
+        f"{number}: {fixtures.teams[home]} vs {fixtures.teams[away]}"
+        for number, home, away in zip(fixtures.match_numbers, fixtures.home, fixtures.away)
+        if rows.get(number, (None, None))[:2] != (fixtures.teams[home], fixtures.teams[away])
+    ]
+    if mismatched:
+        raise ValueError(f"Simulated matches not in schedule: {mismatched}")
+
+    outcome = np.zeros(len(fixtures.home), dtype=np.uint8)
+    known = np.zeros(len(fixtures.home), dtype=bool)
+    for j, (number, home, away) in enumerate(zip(fixtures.match_numbers, fixtures.home, fixtures.away)):
+        result = rows[number][2]
+        if result == fixtures.teams[home]:
+            outcome[j] = known[j] = 1
+        elif result == fixtures.teams[away]:
+            known[j] = True
+    return outcome, known
+
+
+# Number of known matches each packed simulation row got wrong: popcount of
+# (row XOR actual) AND known, a byte table lookup per packed byte
+def hamming_distances(bits, actual, known):
+    packed_actual = np.packbits(actual, bitorder='little')
+    packed_known = np.packbits(known, bitorder='little')
+    distances = np.empty(len(bits), dtype=np.int32)
+    for start in range(0, len(bits), CHUNK_SIZE):
+        wrong = (bits[start:start + CHUNK_SIZE] ^ packed_actual) & packed_known
+        distances[start:start + CHUNK_SIZE] = _POPCOUNT[wrong].sum(axis=1, dtype=np.int32)
+    return distances
+
+
+# The k simulations with the smallest distances, nearest first (ties by simulation number)
+def nearest_simulations(distances, k=10):
+    k = min(k, len(distances))
+    if k == 0:
+        return np.zeros(0, dtype=np.intp), distances[:0]
+    nearest = np.argpartition(distances, k - 1)[:k]
+    nearest = nearest[np.lexsort((nearest, distances[nearest]))]
+    return nearest, distances[nearest]
+
+
+# Mean squared error of predicted qualification probabilities (in %) against
+# the teams that actually qualified
+def brier_score(teams, percentages, qualified):
+    predicted = np.array([percentages.get(team, 0.0) / 100 for team in teams])
+    happened = np.array([team in qualified for team in teams], dtype=np.float64)
+    return float(np.mean((predicted - happened) ** 2))
+
+
+# Score every stored simulation against the actual results in one pass. Returns
+# the nearest simulations as (simulation, matches wrong, match %) and, once every
+# simulated match has a result, the Brier score of the store's own predictions.
+def backtest(store, schedule, k=10):
+    fixtures = store.fixtures
+    actual, known = actual_outcomes(fixtures, schedule)
+    compared = int(known.sum())
+    distances = hamming_distances(store.bits, actual, known)
+    nearest, nearest_distances = nearest_simulations(distances, k)
+    report = {
+        'compared': compared,
+        'distances': distances,
+        'nearest': [
+            (sim, distance, 100 * (compared - distance) / compared if compared else 0.0)
+            for sim, distance in zip(nearest.tolist(), nearest_distances.tolist())
+        ],
+        'brier': None,
+    }
+
+    if schedule['Result'].notnull().all():
+        weights = store.weights
+        qualifying = store.points >= store.qualifying_points
+        if weights is None:
+            counts, total = qualifying.sum(axis=0), len(store)
+        else:
+            counts, total = weights @ qualifying, weights.sum()
+        predicted = to_percentages(fixtures, counts, total) if total else {}
+        final = results_points(schedule, fixtures.teams)
+        qualified = {team for team, points in final.items() if points >= store.qualifying_points}
+        report['brier'] = brier_score(fixtures.teams, predicted, qualified)
+        report['predicted'] = predicted
+        report['qualified'] = qualified
+    return report
@@ -0,0 +1,150 @@
+import numpy as np
+
+from .fixtures import away_points, swing_matrix, to_percentages
+from .scenario_store import ScenarioStore
+from .vectorized import DEFAULT_BATCH_SIZE, simulate_batch
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+# splitmix64 finaliser: spreads keys evenly over 64 bits (wrapping arithmetic)
+def _mix64(keys):
+    with np.errstate(over='ignore'):
+        keys = keys.astype(np.uint64)
+        keys = (keys ^ (keys >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        keys = (keys ^ (keys >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return keys ^ (keys >> np.uint64(31))
+
+
+# One 64-bit key per simulation from its outcome bits
+def scenario_keys(outcomes):
+    return packed_keys(np.packbits(outcomes, axis=1, bitorder='little'))
+
+
+# The same keys straight from packed rows (ScenarioStore.bits). Up to 64 matches
+# the mask itself is the key (exact); beyond that 8-byte words are hashed together.
+def packed_keys(packed):
+    width = -(-packed.shape[1] // 8) * 8
+    words = np.zeros((len(packed), width), dtype=np.uint8)
+    words[:, :packed.shape[1]] = packed
+    words = words.view('<u8')
+    if words.shape[1] == 1:
+        return words[:, 0].copy()
+    keys = np.zeros(len(words), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in range(words.shape[1]):
+            keys = _mix64(keys * np.uint64(31) + words[:, column])
+    return keys
+
+
+# Number of leading zero bits in each uint64
+def _leading_zeros(values):
+    zeros = np.zeros(len(values), dtype=np.int64)
+    values = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = values < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[empty] += shift
+        values[empty] <<= np.uint64(shift)
+    zeros[values == 0] += 1
+    return zeros
+
+
+# Streaming duplicate detection over simulation batches. Exact mode keeps the
+# distinct keys and their multiplicities; approximate mode keeps only a
+# HyperLogLog sketch of 2^precision registers, for runs too large to remember.
+class DuplicateCounter:
+    def __init__(self, approximate=False, precision=14):
+        self.approximate = approximate
+        self.precision = precision
+        self.total = 0
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.multiplicity = np.zeros(0, dtype=np.int64)
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def empty_copy(self):
+        return DuplicateCounter(self.approximate, self.precision)
+
+    def add_batch(self, outcomes, points=None, weights=None):
+        self.add_keys(scenario_keys(outcomes))
+
+    def add_keys(self, keys):
+        self.total += len(keys)
+        if self.approximate:
+            hashed = _mix64(keys)
+            index = (hashed >> np.uint64(64 - self.precision)).astype(np.int64)
+            rank = _leading_zeros((hashed << np.uint64(self.precision)) & _MASK64)
+            rank = np.minimum(rank, 64 - self.precision) + 1
+            np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        else:
+            self._merge_keys(*np.unique(keys, return_counts=True))
+
+    def _merge_keys(self, keys, multiplicity):
+        merged, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        counts = np.zeros(len(merged), dtype=np.int64)
+        np.add.at(counts, inverse, np.concatenate([self.multiplicity, multiplicity]))
+        self.keys, self.multiplicity = merged, counts
+
+    def merge(self, other):
+        self.total += other.total
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if not self.approximate:
+            self._merge_keys(other.keys, other.multiplicity)
+
+    # Keys already seen, for filtering new draws
+    def seen(self, keys):
+        return np.isin(keys, self.keys)
+
+    def distinct(self):
+        if not self.approximate:
+            return len(self.keys)
+        registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / registers)
+        estimate = alpha * registers ** 2 / np.sum(2.0 ** -self.registers.astype(np.float64))
+        empty = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * registers and empty:
+            estimate = registers * np.log(registers / empty)  # linear counting for small sets
+        return int(round(estimate))
+
+    # Same figures duplicate_check.py prints; approximate mode only knows the distinct count
+    def summary(self):
+        distinct = self.distinct()
+        summary = {'simulations': self.total, 'distinct': distinct, 'duplicates': self.total - distinct}
+        if not self.approximate:
+            summary['duplicated_sets'] = int(np.count_nonzero(self.multiplicity > 1))
+        return summary
+
+
+# "Unique scenarios only" sampling: keep drawing until `simulations` distinct
+# outcome vectors have been seen (or max_draws is reached), counting each one
+# once. Probabilities are then over distinct scenarios, which is only the same
+# as the usual estimate when every scenario is equally likely.
+def run_unique_monte_carlo(fixtures, qualifying_points, simulations=100_000, seed=None, max_draws=None,
+                           batch_size=DEFAULT_BATCH_SIZE, keep_scenarios=False, collectors=(), probabilities=None):
+    if max_draws is None:
+        max_draws = 20 * simulations
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    swing = swing_matrix(fixtures)
+    floor = away_points(fixtures)
+
+    seen = DuplicateCounter()
+    store = ScenarioStore(fixtures, qualifying_points) if keep_scenarios else None
+    sinks = list(collectors) + ([store] if store is not None else [])
+    counts = np.zeros(len(fixtures.teams), dtype=np.int64)
+    draws = 0
+
+    while seen.distinct() < simulations and draws < max_draws:
+        size = min(batch_size, max_draws - draws)
+        outcomes, points = simulate_batch(fixtures, root.spawn(1)[0], size, swing, floor, probabilities)
+        draws += size
+        keys = scenario_keys(outcomes)
+        _, first = np.unique(keys, return_index=True)
+        first = np.sort(first)
+        first = first[~seen.seen(keys[first])][:simulations - seen.distinct()]
+        seen.add_keys(keys[first])
+        counts += np.count_nonzero(points[first] >= qualifying_points, axis=0)
+        for sink in sinks:
+            sink.add_batch(outcomes[first], points[first])
+
+    distinct = seen.distinct()
+    summary = {'draws': draws, 'distinct': distinct}
+    return to_percentages(fixtures, counts, max(distinct, 1)), store, summary
@@ -0,0 +1,160 @@
+from collections import deque
+from itertools import combinations
+
+import numpy as np
+
+# Clinch/elimination for a top-k finish in polynomial time. For each candidate
+# set of rival teams the question reduces to a bipartite max-flow over the
+# remaining fixtures, as in the classic baseball elimination problem; with k
+# fixed there are only C(teams - 1, k) candidate sets. Remaining matches are
+# assumed to be decided (2 points to the winner).
+
+
+# Edmonds-Karp max-flow on a dense capacity matrix (graphs here are ~60 nodes)
+def _max_flow(capacity, source, sink):
+    capacity = capacity.copy()
+    node_count = len(capacity)
+    flow = 0
+    while True:
+        parent = [-1] * node_count
+        parent[source] = source
+        queue = deque([source])
+        while queue and parent[sink] == -1:
+            node = queue.popleft()
+            for nxt in np.flatnonzero(capacity[node] > 0).tolist():
+                if parent[nxt] == -1:
+                    parent[nxt] = node
+                    queue.append(nxt)
+        if parent[sink] == -1:
+            return flow
+        bottleneck = capacity[parent[sink], sink]
+        node = sink
+        while node != source:
+            bottleneck = min(bottleneck, capacity[parent[node], node])
+            node = parent[node]
+        node = sink
+        while node != source:
+            capacity[parent[node], node] -= bottleneck
+            capacity[node, parent[node]] += bottleneck
+            node = parent[node]
+        flow += bottleneck
+
+
+# Can the matches among `teams` be split so that team j wins at least (or at most)
+# wins[j] of them? Source -> match -> either team -> sink, capacity wins[j].
+def _split_matches(matches, teams, wins):
+    slot = {team: i for i, team in enumerate(teams)}
+    source, sink = 0, 1
+    node_count = 2 + len(matches) + len(teams)
+    capacity = np.zeros((node_count, node_count), dtype=np.int64)
+    for i, (home, away) in enumerate(matches):
+        capacity[source, 2 + i] = 1
+        capacity[2 + i, 2 + len(matches) + slot[home]] = 1
+        capacity[2 + i, 2 + len(matches) + slot[away]] = 1
+    for team in teams:
+        capacity[2 + len(matches) + slot[team], sink] = wins[team]
+    return _max_flow(capacity, source, sink)
+
+
+def _remaining(fixtures, team_idx):
+    return list(zip(fixtures.home.tolist(), fixtures.away.tolist())), int(
+        np.count_nonzero((fixtures.home == team_idx) | (fixtures.away == team_idx)))
+
+
+# Is there a completion where at most top - 1 rivals end strictly above `points`?
+# If rivals_take_own_matches, the team's own remaining matches count as rival wins.
+def _can_reach_top(fixtures, team_idx, points, top, rivals_take_own_matches):
+    fixtures_list, _ = _remaining(fixtures, team_idx)
+    current = fixtures.base_points.astype(np.int64).copy()
+    others = [t for t in range(len(fixtures.teams)) if t != team_idx]
+    matches = []
+    for home, away in fixtures_list:
+        if team_idx in (home, away):
+            if rivals_take_own_matches:
+                current[away if home == team_idx else home] += 2
+        else:
+            matches.append((home, away))
+
+    ahead = [t for t in others if current[t] > points]
+    if len(ahead) >= top:
+        return False
+    candidates = [t for t in others if t not in ahead]
+    for free in combinations(candidates, min(top - 1 - len(ahead), len(candidates))):
+        free = set(free) | set(ahead)
+        capped = [t for t in others if t not in free]
+        # Matches against a free rival go to that rival; the rest must keep every capped team <= points
+        capped_matches = [(h, a) for h, a in matches if h not in free and a not in free]
+        wins = {t: (points - current[t]) // 2 for t in capped}
+        if _split_matches(capped_matches, capped, wins) == len(capped_matches):
+            return True
+    return False
+
+
+# Is there a completion where at least `top` rivals reach `points` (or more)?
+def _rivals_can_pass(fixtures, team_idx, points, top, rivals_take_own_matches):
+    fixtures_list, _ = _remaining(fixtures, team_idx)
+    others = [t for t in range(len(fixtures.teams)) if t != team_idx]
+    if len(others) < top:
+        return False
+    for chasers in combinations(others, top):
+        chasers = set(chasers)
+        current = fixtures.base_points.astype(np.int64).copy()
+        inner = []
+        for home, away in fixtures_list:
+            if team_idx in (home, away):
+                rival = away if home == team_idx else home
+                if rivals_take_own_matches:
+                    current[rival] += 2
+            elif home in chasers and away in chasers:
+                inner.append((home, away))
+            elif home in chasers:
+                current[home] += 2
+            elif away in chasers:
+                current[away] += 2
+        needed = {t: max(0, -(-(points - int(current[t])) // 2)) for t in chasers}
+        if sum(needed.values()) <= len(inner) and _split_matches(inner, sorted(chasers), needed) == sum(needed.values()):
+            return True
+    return False
+
+
+# Clinch/elimination status and magic numbers for every team.
+#   clinched:   top `top` finish guaranteed even if the team loses out, with no tie-break needed
+#   eliminated: even winning out, at least `top` teams finish strictly above
+#   clinch_number: further wins that guarantee the spot whatever else happens
+#   elimination_number: further losses that rule it out whatever else happens
+# Both numbers are exact at 0 (the statuses); above 0 they are safe upper bounds,
+# since the opponents in those games are treated as worst (or best) case.
+def clinch_report(fixtures, top=4):
+    report = {}
+    for team_idx, team in enumerate(fixtures.teams):
+        _, remaining = _remaining(fixtures, team_idx)
+        base = int(fixtures.base_points[team_idx])
+
+        clinch_number = next(
+            (wins for wins in range(remaining + 1)
+             if not _rivals_can_pass(fixtures, team_idx, base + 2 * wins, top, True)),
+            None)
+        elimination_number = next(
+            (losses for losses in range(remaining + 1)
+             if not _can_reach_top(fixtures, team_idx, base + 2 * (remaining - losses), top, False)),
+            None)
+
+        if clinch_number == 0:
+            status = 'clinched'
+        elif elimination_number == 0:
+            status = 'eliminated'
+        else:
+            status = 'alive'
+        report[team] = {
+            'status': status,
+            'min_points': base,
+            'max_points': base + 2 * remaining,
+            'clinch_number': clinch_number,
+            'elimination_number': elimination_number,
+        }
+    return report
+
+
+# Teams whose top-k fate is still open; engines can restrict their work to these
+def undecided_teams(report):
+    return [team for team, row in report.items() if row['status'] == 'alive']
@@ -0,0 +1,100 @@
+import numpy as np
+from collections import namedtuple
+
+# Compiled form of the remaining schedule. Teams are indexed by their position
+# in `teams`; an outcome of True (1) means the home team won the match.
+Fixtures = namedtuple('Fixtures', ['teams', 'base_points', 'home', 'away', 'match_numbers'])
+
+
+# Turn the upcoming matches DataFrame and points table from load_data into arrays
+def compile_fixtures(matches, base_points):
+    teams = list(base_points.keys())
+    team_index = {team: i for i, team in enumerate(teams)}
+
+    home, away = [], []
+    for home_team, away_team in zip(matches['Home Team'], matches['Away Team']):
+        for team in (home_team, away_team):
+            if team not in team_index:
+                raise ValueError(f"Unknown team in schedule: {team}")
+        home.append(team_index[home_team])
+        away.append(team_index[away_team])
+
+    if 'Match Number' in matches:
+        match_numbers = np.asarray(matches['Match Number'], dtype=np.int64)
+    else:
+        match_numbers = np.arange(1, len(home) + 1, dtype=np.int64)
+
+    return Fixtures(
+        teams=teams,
+        base_points=np.array([base_points[team] for team in teams], dtype=np.int16),
+        home=np.array(home, dtype=np.intp),
+        away=np.array(away, dtype=np.intp),
+        match_numbers=match_numbers,
+    )
+
+
+# Fixtures with some remaining matches decided: `results` maps a match index to
+# True (home win) or False (away win). Decided matches move into base_points.
+def pin_results(fixtures, results):
+    base_points = fixtures.base_points.copy()
+    for match, home_won in results.items():
+        base_points[fixtures.home[match] if home_won else fixtures.away[match]] += 2
+    keep = np.ones(len(fixtures.home), dtype=bool)
+    keep[list(results)] = False
+    return Fixtures(
+        teams=fixtures.teams,
+        base_points=base_points,
+        home=fixtures.home[keep],
+        away=fixtures.away[keep],
+        match_numbers=fixtures.match_numbers[keep],
+    )
+
+
+# Points every team ends on if all remaining matches go to the away side
+def away_points(fixtures):
+    away_wins = np.bincount(fixtures.away, minlength=len(fixtures.teams))
+    return fixtures.base_points + 2 * away_wins.astype(np.int16)
+
+
+# Team/match incidence matrix: points gained when a match flips from away win to home win
+def swing_matrix(fixtures, dtype=np.float32):
+    match_count = len(fixtures.home)
+    swing = np.zeros((match_count, len(fixtures.teams)), dtype=dtype)
+    rows = np.arange(match_count)
+    swing[rows, fixtures.home] += 2
+    swing[rows, fixtures.away] -= 2
+    return swing
+
+
+# Final points per team for a (simulations x matches) boolean outcome matrix
+def final_points(fixtures, outcomes, swing=None, floor=None):
+    if swing is None:
+        swing = swing_matrix(fixtures)
+    if floor is None:
+        floor = away_points(fixtures)
+    # float32 matmul goes through BLAS and is exact for these small integers
+    points = np.asarray(outcomes, dtype=np.float32) @ swing
+    return points.astype(np.int16) + floor
+
+
+# "Home vs Away" label for every remaining match, as used in the CSV exports
+def match_labels(fixtures):
+    return [
+        f"{fixtures.teams[h]} vs {fixtures.teams[a]}"
+        for h, a in zip(fixtures.home, fixtures.away)
+    ]
+
+
+# Winner names for a single simulation's outcome row
+def winner_names(fixtures, outcome_row):
+    winners = np.where(np.asarray(outcome_row, dtype=bool), fixtures.home, fixtures.away)
+    return [fixtures.teams[i] for i in winners]
+
+
+# Qualification counts to the {team: percentage} mapping main() tabulates
+def to_percentages(fixtures, counts, total):
+    return {
+        team: (count / total) * 100
+        for team, count in zip(fixtures.teams, np.asarray(counts).tolist())
+        if count > 0
+    }
@@ -0,0 +1,213 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from .fixtures import away_points, swing_matrix, to_percentages
+from .scenario_store import ScenarioStore
+from .thresholds import PointsHistogram
+
+# The first LOW_BITS matches are expanded into one points block up front; the
+# remaining (high) matches are walked one Gray-code step at a time on top of it.
+LOW_BITS = 16
+# Below this many high-half steps a process pool costs more than it saves
+MIN_STEPS_PER_WORKER = 1024
+
+
+# Scenario k of the enumeration sets the outcome bits of gray(k) (bit j = home win in match j)
+def gray_code(index):
+    return index ^ (index >> 1)
+
+
+# Outcome matrix for `size` consecutive scenarios of the Gray-code walk
+def gray_code_outcomes(match_count, start, size):
+    masks = gray_code(np.arange(start, start + size, dtype=np.uint64))
+    return ((masks[:, None] >> np.arange(match_count, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+
+
+# Points deltas for every combination of the low matches, in reflected Gray-code
+# order: G(j+1) is G(j) followed by G(j) reversed with match j flipped to a home win.
+def _gray_block(swing):
+    block = np.zeros((1, swing.shape[1]), dtype=np.int16)
+    for row in swing:
+        block = np.concatenate([block, block[::-1] + row])
+    return block
+
+
+# Probability of every low-block combination, built in the same order as _gray_block
+def _gray_weights(probabilities):
+    weights = np.ones(1)
+    for probability in probabilities:
+        weights = np.concatenate([weights * (1 - probability), weights[::-1] * probability])
+    return weights
+
+
+# Probability of the high-half outcome gray(high)
+def _high_weight(high, high_probabilities):
+    bits = (gray_code(high) >> np.arange(len(high_probabilities))) & 1
+    return np.where(bits == 1, high_probabilities, 1 - high_probabilities).prod()
+
+
+# Per team, how many low-block combinations (or how much probability, given
+# weights) reach at least each points delta. Column i covers deltas >= lowest + i;
+# the extra last column is always zero.
+def _tail_counts(block, weights=None):
+    lowest = int(block.min())
+    span = int(block.max()) - lowest + 1
+    tails = np.zeros((block.shape[1], span + 1), dtype=np.int64 if weights is None else np.float64)
+    for team in range(block.shape[1]):
+        histogram = np.bincount(block[:, team] - lowest, weights, minlength=span)
+        tails[team, :span] = np.cumsum(histogram[::-1])[::-1]
+    return tails, lowest
+
+
+# Points offset of every high-half scenario in [high_start, high_stop). The walk
+# jumps straight to gray(high_start); after that each step flips a single match
+# and moves exactly two teams' points.
+def _walk_offsets(fixtures, low_bits, high_start, high_stop):
+    high_swing = swing_matrix(fixtures, dtype=np.int16)[low_bits:]
+    offset = away_points(fixtures).astype(np.int64)
+    start_mask = gray_code(high_start)
+    for bit in range(len(high_swing)):
+        if start_mask >> bit & 1:
+            offset += high_swing[bit]
+
+    for high in range(high_start, high_stop):
+        if high != high_start:
+            bit = (high & -high).bit_length() - 1
+            match = low_bits + bit
+            sign = 2 if gray_code(high) >> bit & 1 else -2
+            offset[fixtures.home[match]] += sign
+            offset[fixtures.away[match]] -= sign
+        yield high, offset
+
+
+# Count qualifiers for high-half scenarios [high_start, high_stop) of the walk.
+# With probabilities the counts are probability masses instead.
+def _count_range(fixtures, qualifying_points, high_start, high_stop, probabilities=None):
+    low_bits = min(LOW_BITS, len(fixtures.home))
+    swing = swing_matrix(fixtures, dtype=np.int16)
+    low_weights = None if probabilities is None else _gray_weights(probabilities[:low_bits])
+    tails, lowest = _tail_counts(_gray_block(swing[:low_bits]), low_weights)
+    team_rows = np.arange(len(fixtures.teams))
+
+    counts = np.zeros(len(fixtures.teams), dtype=tails.dtype)
+    for high, offset in _walk_offsets(fixtures, low_bits, high_start, high_stop):
+        # A team qualifies in every low combination whose delta reaches qualifying_points - offset
+        needed = np.clip(qualifying_points - offset - lowest, 0, tails.shape[1] - 1)
+        if probabilities is None:
+            counts += tails[team_rows, needed]
+        else:
+            counts += _high_weight(high, probabilities[low_bits:]) * tails[team_rows, needed]
+    return counts
+
+
+# Hand every scenario in [high_start, high_stop) to the collectors, one low block at a time
+def _feed_range(fixtures, collectors, high_start, high_stop, probabilities=None):
+    match_count = len(fixtures.home)
+    low_bits = min(LOW_BITS, match_count)
+    block = _gray_block(swing_matrix(fixtures, dtype=np.int16)[:low_bits])
+    reversed_block = block[::-1]
+    low_weights = None if probabilities is None else _gray_weights(probabilities[:low_bits])
+
+    for high, offset in _walk_offsets(fixtures, low_bits, high_start, high_stop):
+        # Odd high indices walk the low block backwards, keeping one flip per step
+        points = (reversed_block if high & 1 else block) + offset.astype(np.int16)
+        outcomes = gray_code_outcomes(match_count, high * len(block), len(block))
+        weights = None
+        if probabilities is not None:
+            weights = (low_weights[::-1] if high & 1 else low_weights) * _high_weight(high, probabilities[low_bits:])
+        for collector in collectors:
+            collector.add_batch(outcomes, points, weights)
+
+
+# Every team's final-points histogram over [high_start, high_stop): each high
+# step shifts the low block's per-team histogram by that team's points offset
+def _histogram_range(fixtures, high_start, high_stop, probabilities=None):
+    low_bits = min(LOW_BITS, len(fixtures.home))
+    block = _gray_block(swing_matrix(fixtures, dtype=np.int16)[:low_bits])
+    low_weights = None if probabilities is None else _gray_weights(probabilities[:low_bits])
+    lowest = int(block.min())
+    span = int(block.max()) - lowest + 1
+    low_histogram = np.stack([np.bincount(column - lowest, low_weights, minlength=span) for column in block.T])
+
+    team_count = len(fixtures.teams)
+    histogram = PointsHistogram(fixtures)
+    columns = np.arange(span)
+    for high, offset in _walk_offsets(fixtures, low_bits, high_start, high_stop):
+        # Reversing the low block (odd high) reorders scenarios but not their histogram
+        weight = 1 if probabilities is None else _high_weight(high, probabilities[low_bits:])
+        histogram.counts[np.arange(team_count)[:, None], (offset + lowest)[:, None] + columns] += weight * low_histogram
+    histogram.total = float(high_stop - high_start) * len(block) if probabilities is None else \
+        float(histogram.counts[0].sum())
+    return histogram
+
+
+def _run_range(fixtures, qualifying_points, high_start, high_stop, collectors, probabilities=None):
+    counts = _count_range(fixtures, qualifying_points, high_start, high_stop, probabilities)
+    if collectors:
+        _feed_range(fixtures, collectors, high_start, high_stop, probabilities)
+    return counts, collectors
+
+
+# Exact enumeration of all 2^n outcomes without per-scenario dicts or strings.
+# With workers > 1 the Gray-code walk is split into contiguous ranges per process.
+# Collectors (e.g. a PositionTable) see every scenario's outcomes and final points.
+# With per-match home-win probabilities, scenarios are weighted by their
+# probability instead of counted.
+def run_gray_code_enumeration(fixtures, qualifying_points, workers=1, keep_scenarios=False, collectors=(),
+                              probabilities=None):
+    match_count = len(fixtures.home)
+    total_combinations = 2 ** match_count
+    high_count = 2 ** max(match_count - LOW_BITS, 0)
+
+    print(f"Total possible combinations: {total_combinations:,}")
+
+    store = ScenarioStore(fixtures, qualifying_points) if keep_scenarios else None
+    sinks = list(collectors) + ([store] if store is not None else [])
+
+    workers = max(1, min(workers or os.cpu_count() or 1, high_count // MIN_STEPS_PER_WORKER))
+    bounds = np.linspace(0, high_count, workers + 1).astype(np.int64).tolist()
+
+    if probabilities is not None:
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+    if workers == 1:
+        qualification_counts, _ = _run_range(fixtures, qualifying_points, 0, high_count, sinks, probabilities)
+    else:
+        qualification_counts = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_run_range, fixtures, qualifying_points, start, stop,
+                            [sink.empty_copy() for sink in sinks], probabilities)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            # Merge in range order so stored scenarios keep their Gray-code numbering
+            for future in futures:
+                counts, range_sinks = future.result()
+                qualification_counts += counts
+                for sink, range_sink in zip(sinks, range_sinks):
+                    sink.merge(range_sink)
+
+    total = total_combinations if probabilities is None else 1
+    qualification_percentages = to_percentages(fixtures, qualification_counts, total)
+    return qualification_percentages, store
+
+
+# Exact final-points histogram of every team over all 2^n outcomes, for
+# threshold sweeps. Uses the same Gray-code walk without materialising scenarios.
+def run_gray_code_histogram(fixtures, workers=1, probabilities=None):
+    high_count = 2 ** max(len(fixtures.home) - LOW_BITS, 0)
+    workers = max(1, min(workers or os.cpu_count() or 1, high_count // MIN_STEPS_PER_WORKER))
+    bounds = np.linspace(0, high_count, workers + 1).astype(np.int64).tolist()
+    if probabilities is not None:
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+
+    if workers == 1:
+        return _histogram_range(fixtures, 0, high_count, probabilities)
+    histogram = PointsHistogram(fixtures)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for range_histogram in pool.map(_histogram_range, repeat(fixtures), bounds[:-1], bounds[1:],
+                                        repeat(probabilities)):
+            histogram.merge(range_histogram)
+    return histogram
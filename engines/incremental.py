@@ -0,0 +1,183 @@
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from .adaptive import Z_95, simulations_for_width
+from .fixtures import final_points, to_percentages
+from .parallel import run_parallel_monte_carlo
+from .scenario_store import ScenarioStore
+from .vectorized import DEFAULT_BATCH_SIZE
+
+# Next to the scripts, so runs from any working directory share one cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.simulation_cache')
+
+
+# Hash of the fixture list (not the results) plus any settings that change how
+# samples are drawn. Entering a result keeps the key, so cached samples survive it.
+def schedule_key(schedule, settings=None):
+    fixtures = [
+        [int(number), home, away]
+        for number, home, away in zip(schedule['Match Number'], schedule['Home Team'], schedule['Away Team'])
+    ]
+    payload = json.dumps({'fixtures': fixtures, 'settings': settings or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+# {match number: 'Home' | 'Away' | 'TIE'} for every completed match in the schedule
+def completed_results(schedule):
+    results = {}
+    for number, home, away, result in zip(schedule['Match Number'], schedule['Home Team'],
+                                          schedule['Away Team'], schedule['Result']):
+        if isinstance(result, str) and result:
+            results[int(number)] = 'TIE' if result == 'TIE' else ('Home' if result == home else 'Away')
+    return results
+
+
+def _cache_path(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.npz")
+
+
+def load_samples(cache_dir, key):
+    path = _cache_path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as cached:
+        return {name: cached[name] for name in cached.files}
+
+
+# Samples are saved with the generation that drew each one and the home-win
+# probabilities every generation was drawn with, one row per generation
+def save_samples(cache_dir, key, match_numbers, bits, sample_generations, proposals, generation):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(cache_dir, key)
+    np.savez(path + '.tmp.npz', match_numbers=match_numbers, bits=bits, sample_generations=sample_generations,
+             proposal_generations=np.array(sorted(proposals), dtype=np.int64),
+             proposals=np.array([proposals[g] for g in sorted(proposals)]).reshape(len(proposals), len(match_numbers)),
+             generation=np.int64(generation))
+    os.replace(path + '.tmp.npz', path)
+
+
+# Bring cached samples up to date with the current remaining fixtures. Columns of
+# newly completed matches are dropped: in 'filter' mode only samples that
+# predicted the actual winner are kept; in 'pin' mode every sample is kept, which
+# is exact because fixtures are sampled independently (a reweighting where all
+# weights are equal). A tie matches no sample, so it is always pinned.
+#
+# Samples drawn under other home-win probabilities (ratings refitted after a
+# result) are importance-weighted by the likelihood ratio of their remaining
+# results, new over the probabilities their generation was drawn with.
+# Returns (outcomes, generations, {generation: probabilities}, weights or None
+# when every sample counts once), or a reason the cache cannot be used.
+def _reuse_samples(cached, fixtures, probabilities, results, mode):
+    if cached is None:
+        return "no cached samples"
+    if 'proposals' not in cached:
+        return "the cache was written by an older version"
+    sampled = cached['match_numbers'].tolist()
+    column = {number: j for j, number in enumerate(sampled)}
+    if any(number not in column for number in fixtures.match_numbers.tolist()):
+        return "a result was removed or the fixtures changed"
+    current_columns = [column[number] for number in fixtures.match_numbers.tolist()]
+
+    outcomes = np.unpackbits(cached['bits'], axis=1, count=len(sampled), bitorder='little').astype(bool)
+    keep = np.ones(len(outcomes), dtype=bool)
+    if mode == 'filter':
+        for number, result in results.items():
+            if number in column and result != 'TIE':
+                keep &= outcomes[:, column[number]] == (result == 'Home')
+    outcomes, generations = outcomes[keep][:, current_columns], cached['sample_generations'][keep]
+    proposals = {
+        int(g): row[current_columns]
+        for g, row in zip(cached['proposal_generations'].tolist(), cached['proposals'])
+        if np.any(generations == g)
+    }
+
+    weights = None
+    for g, proposal in proposals.items():
+        if np.allclose(proposal, probabilities):
+            continue
+        if weights is None:
+            weights = np.ones(len(outcomes))
+        rows = generations == g
+        home_ratio = np.log(probabilities) - np.log(proposal)
+        away_ratio = np.log1p(-probabilities) - np.log1p(-proposal)
+        weights[rows] = np.exp(outcomes[rows] @ (home_ratio - away_ratio) + away_ratio.sum())
+    return outcomes, generations, proposals, weights
+
+
+# Samples needed so every team's 95% interval is narrower than target_width
+def required_simulations(counts, simulations, target_width):
+    if simulations == 0:
+        return 1
+    # Normal approximation, floored by what a Wilson interval needs at p = 0 or 1
+    return max(simulations_for_width(target_width, counts / simulations), math.ceil(Z_95 ** 2 / target_width))
+
+
+# Monte Carlo that persists its samples between runs. Cached samples consistent
+# with the results entered since are reused; fresh ones are only drawn when
+# fewer than `simulations` remain or the precision target is no longer met.
+def run_incremental_monte_carlo(schedule, fixtures, qualifying_points, simulations=100_000, target_width=None,
+                                seed=0, cache_dir=DEFAULT_CACHE_DIR, mode='filter', workers=1,
+                                keep_scenarios=False, collectors=(), batch_size=DEFAULT_BATCH_SIZE,
+                                probabilities=None):
+    key = schedule_key(schedule, {'seed': seed, 'batch_size': batch_size})
+    if probabilities is None:
+        probabilities = np.full(len(fixtures.home), 0.5)
+    cached = load_samples(cache_dir, key)
+    reuse = _reuse_samples(cached, fixtures, probabilities, completed_results(schedule), mode)
+    discarded = reuse if isinstance(reuse, str) else None
+    if discarded is None:
+        outcomes, generations, proposals, weights = reuse
+        generation = int(cached['generation']) + 1
+    else:
+        outcomes, generations = np.zeros((0, len(fixtures.home)), dtype=bool), np.zeros(0, dtype=np.int64)
+        proposals, weights, generation = {}, None, 0
+
+    reused = len(outcomes)
+    points = final_points(fixtures, outcomes)
+    qualifying = points >= qualifying_points
+    if weights is None:
+        counts, total, effective = np.count_nonzero(qualifying, axis=0), reused, reused
+    else:
+        counts, total = weights @ qualifying, weights.sum()
+        effective = total ** 2 / (weights @ weights) if reused else 0
+
+    store = ScenarioStore(fixtures, qualifying_points)
+    store.add_batch(outcomes, points, weights)
+    for collector in collectors:
+        collector.add_batch(outcomes, points, weights)
+
+    needed = simulations
+    if target_width is not None:
+        scaled = counts * (effective / total) if total else counts
+        needed = max(needed, required_simulations(scaled, effective, target_width))
+
+    # Each top-up draws from its own generation of seeds, so it never repeats earlier
+    # samples; reweighted samples count for their effective sample size
+    drawn = max(int(np.ceil(needed - effective)), 0)
+    if drawn:
+        top_up_seed = np.random.SeedSequence(seed, spawn_key=(generation,))
+        _, fresh = run_parallel_monte_carlo(fixtures, qualifying_points, drawn, seed=top_up_seed,
+                                            workers=workers, shard_size=batch_size, keep_scenarios=True,
+                                            collectors=collectors, probabilities=probabilities)
+        counts = counts + np.count_nonzero(fresh.points >= qualifying_points, axis=0)
+        total += drawn
+        if weights is None:
+            store.merge(fresh)
+        else:
+            # Fresh samples follow the current probabilities, so their weight is 1
+            store = ScenarioStore.from_arrays(fixtures, qualifying_points,
+                                              np.concatenate([store.bits, fresh.bits]),
+                                              np.concatenate([store.points, fresh.points]),
+                                              np.concatenate([weights, np.ones(drawn)]))
+        generations = np.concatenate([generations, np.full(drawn, generation)])
+        proposals[generation] = probabilities
+
+    save_samples(cache_dir, key, fixtures.match_numbers, store.bits, generations, proposals, generation)
+
+    summary = {'reused': reused, 'effective': effective, 'drawn': drawn, 'simulations': len(store),
+               'discarded': discarded if cached is not None else None}
+    return to_percentages(fixtures, counts, total), store if keep_scenarios else None, summary
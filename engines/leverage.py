@@ -0,0 +1,145 @@
+import numpy as np
+
+from .elimination import _can_reach_top, _rivals_can_pass
+from .fixtures import match_labels, pin_results
+from .positions import CHUNK_SIZE
+
+
+# How much each remaining result moves each team's chances, collected in the
+# same pass as everything else: for match j and team t it keeps the mass of
+# scenarios where j went home and t qualified (one outcomes.T @ qualified matmul
+# per batch), from which P(t qualifies | home win) and P(t qualifies | away win)
+# follow. Qualifying is reaching qualifying_points or, with `top` set, finishing
+# in the top k, where a team level on points at the cut gets its share of the
+# places left (as in PositionTable).
+class LeverageTable:
+    def __init__(self, fixtures, qualifying_points=None, top=None):
+        if (qualifying_points is None) == (top is None):
+            raise ValueError("Give either qualifying_points or top")
+        self.fixtures = fixtures
+        self.qualifying_points = qualifying_points
+        self.top = top
+        match_count, team_count = len(fixtures.home), len(fixtures.teams)
+        self.home_mass = np.zeros(match_count)
+        self.joint = np.zeros((match_count, team_count))
+        self.qualified = np.zeros(team_count)
+        self.total = 0.0
+
+    def empty_copy(self):
+        return LeverageTable(self.fixtures, self.qualifying_points, self.top)
+
+    def merge(self, other):
+        self.home_mass += other.home_mass
+        self.joint += other.joint
+        self.qualified += other.qualified
+        self.total += other.total
+
+    def _qualified(self, points):
+        points = np.asarray(points, dtype=np.int16)
+        if self.top is None:
+            return (points >= self.qualifying_points).astype(np.float64)
+        above = (points[:, None, :] > points[:, :, None]).sum(axis=2)
+        level = (points[:, None, :] == points[:, :, None]).sum(axis=2)
+        return np.clip((self.top - above) / level, 0, 1)
+
+    def add_batch(self, outcomes, points, weights=None):
+        for start in range(0, len(points), CHUNK_SIZE):
+            chunk_weights = None if weights is None else weights[start:start + CHUNK_SIZE]
+            self._add_chunk(outcomes[start:start + CHUNK_SIZE], points[start:start + CHUNK_SIZE], chunk_weights)
+
+    def _add_chunk(self, outcomes, points, weights=None):
+        qualified = self._qualified(points)
+        # float64 throughout: top-k shares and importance weights are fractional, so
+        # float32 sums would drift from the exact engines
+        home = np.asarray(outcomes, dtype=np.float64)
+        if weights is None:
+            weights = np.ones(len(home))
+        else:
+            qualified = qualified * weights[:, None]
+        self.joint += home.T @ qualified
+        self.home_mass += weights @ home
+        self.qualified += qualified.sum(axis=0, dtype=np.float64)
+        self.total += weights.sum()
+
+    # (P(qualify | home win), P(qualify | away win)) as (matches x teams) arrays;
+    # NaN where a result never came up
+    def conditional(self):
+        away_mass = self.total - self.home_mass
+        with np.errstate(invalid='ignore', divide='ignore'):
+            given_home = self.joint / self.home_mass[:, None]
+            given_away = (self.qualified - self.joint) / away_mass[:, None]
+        return given_home, given_away
+
+    # Remaining matches for one team, biggest swing first: (match index, label,
+    # P | home win %, P | away win %, winner the team wants)
+    def ranking(self, team):
+        team_idx = self.fixtures.teams.index(team)
+        given_home, given_away = self.conditional()
+        swing = np.nan_to_num(given_home[:, team_idx] - given_away[:, team_idx])
+        labels = match_labels(self.fixtures)
+        rows = []
+        for match in np.argsort(-np.abs(swing), kind='stable').tolist():
+            wanted = self.fixtures.home[match] if swing[match] >= 0 else self.fixtures.away[match]
+            rows.append((match, labels[match], given_home[match, team_idx] * 100,
+                         given_away[match, team_idx] * 100, self.fixtures.teams[wanted]))
+        return rows
+
+
+# Does the team finish where it needs to whatever happens in `fixtures`?
+def _guaranteed(fixtures, team_idx, qualifying_points, top):
+    base = int(fixtures.base_points[team_idx])
+    if top is None:
+        return base >= qualifying_points
+    return not _rivals_can_pass(fixtures, team_idx, base, top, True)
+
+
+# Is the team out whatever happens in `fixtures`?
+def _ruled_out(fixtures, team_idx, qualifying_points, top):
+    own = int(np.count_nonzero((fixtures.home == team_idx) | (fixtures.away == team_idx)))
+    best = int(fixtures.base_points[team_idx]) + 2 * own
+    if top is None:
+        return best < qualifying_points
+    return not _can_reach_top(fixtures, team_idx, best, top, False)
+
+
+# Pin results in `order` until `done` holds, then drop any that turn out not to
+# be needed. The result is minimal (no pinned result can be removed), which for
+# points thresholds is also the smallest possible set.
+def _minimal_results(fixtures, team_idx, order, done):
+    pinned = {}
+    for match, home_won in order:
+        if done(pin_results(fixtures, pinned)):
+            break
+        pinned[match] = home_won
+    if not done(pin_results(fixtures, pinned)):
+        return None
+    for match in list(pinned)[::-1]:
+        trial = {m: won for m, won in pinned.items() if m != match}
+        if done(pin_results(fixtures, trial)):
+            pinned = trial
+    return pinned
+
+
+# A minimal set of results that guarantees the team qualifies and one that rules
+# it out, each as [(match label, winner)], or None when no set can. Results are
+# tried in the LeverageTable's ranking order, the team's own matches first.
+def deciding_results(leverage, team):
+    fixtures = leverage.fixtures
+    team_idx = fixtures.teams.index(team)
+    labels = match_labels(fixtures)
+    ranking = leverage.ranking(team)
+    own = (fixtures.home == team_idx) | (fixtures.away == team_idx)
+    ranking.sort(key=lambda row: not own[row[0]])
+
+    wanted = [(match, fixtures.teams[fixtures.home[match]] == winner) for match, _, _, _, winner in ranking]
+    unwanted = [(match, not home_won) for match, home_won in wanted]
+    q, top = leverage.qualifying_points, leverage.top
+    guarantee = _minimal_results(fixtures, team_idx, wanted, lambda f: _guaranteed(f, team_idx, q, top))
+    rule_out = _minimal_results(fixtures, team_idx, unwanted, lambda f: _ruled_out(f, team_idx, q, top))
+
+    def named(pinned):
+        if pinned is None:
+            return None
+        return [(labels[m], fixtures.teams[fixtures.home[m] if won else fixtures.away[m]]) for m, won in pinned.items()]
+
+    return {'guarantee': named(guarantee), 'rule_out': named(rule_out)}
@@ -0,0 +1,104 @@
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Functions kept from each cProfile'd phase, by cumulative time
+PROFILE_TOP = 15
+
+
+# Phase timings and counters for one run, emitted as a single JSON record.
+# Phases may repeat (times add up) and nest; the phases named in `profile` also
+# run under cProfile, one at a time, and their busiest functions go in the record.
+class Metrics:
+    enabled = True
+
+    def __init__(self, profile=()):
+        self.profile = set(profile)
+        self.phases = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.profiles = {}
+
+    @contextmanager
+    def phase(self, name):
+        profiler = cProfile.Profile() if name in self.profile else None
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.profiles[name] = _top_functions(profiler)
+            self.phases[name] += time.perf_counter() - start
+
+    def count(self, name, amount=1):
+        self.counters[name] += int(amount)
+
+    # Size of a file just written, under `name` (bytes_written unless told otherwise)
+    def count_file(self, path, name='bytes_written'):
+        self.count(name, os.path.getsize(path))
+
+    def record(self):
+        record = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'counters': dict(self.counters),
+        }
+        if self.profiles:
+            record['profiles'] = self.profiles
+        return record
+
+    # One JSON line to stdout ("-") or appended to a file, so runs accumulate
+    def emit(self, destination='-'):
+        line = json.dumps(self.record())
+        if destination == '-':
+            print(line, file=sys.stdout)
+        else:
+            with open(destination, 'a') as f:
+                f.write(line + '\n')
+
+
+# Stand-in when metrics are off: phases are one shared no-op context manager and
+# counters do nothing, so instrumented code pays a method call per phase
+class _NullMetrics:
+    enabled = False
+    _phase = nullcontext()
+
+    def phase(self, name):
+        return self._phase
+
+    def count(self, name, amount=1):
+        pass
+
+    def count_file(self, path, name='bytes_written'):
+        pass
+
+    def record(self):
+        return {}
+
+    def emit(self, destination='-'):
+        pass
+
+
+NULL_METRICS = _NullMetrics()
+
+
+# Metrics for a run: the real thing when there is somewhere to emit them
+def metrics_for(destination, profile=()):
+    return Metrics(profile) if destination else NULL_METRICS
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+    return [
+        {'function': f"{os.path.basename(file)}:{line}({name})", 'calls': calls,
+         'own_seconds': round(own, 6), 'cumulative_seconds': round(cumulative, 6)}
+        for (file, line, name), (_, calls, own, cumulative, _) in rows
+    ]
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from .fixtures import to_percentages
+from .scenario_store import ScenarioStore
+from .vectorized import DEFAULT_BATCH_SIZE, batch_seeds, simulate_batch
+
+
+# Worker entry point: simulate one shard and return its counts and filled collectors
+def _run_shard(fixtures, qualifying_points, seed_sequence, size, collectors, probabilities):
+    outcomes, points = simulate_batch(fixtures, seed_sequence, size, probabilities=probabilities)
+    counts = np.count_nonzero(points >= qualifying_points, axis=0)
+    for collector in collectors:
+        collector.add_batch(outcomes, points)
+    return counts, collectors
+
+
+# Monte Carlo across a process pool. Shards are fixed by the master seed and
+# shard size, each draws from its own spawned seed sequence, and results are
+# merged in shard order, so the output is bit-identical to
+# run_vectorized_monte_carlo with the same seed for any number of workers.
+def run_parallel_monte_carlo(fixtures, qualifying_points, simulations=1_000_000, seed=None, workers=None,
+                             shard_size=DEFAULT_BATCH_SIZE, keep_scenarios=False, collectors=(),
+                             probabilities=None):
+    seeds = batch_seeds(seed, simulations, shard_size)
+    sizes = [min(shard_size, simulations - shard * shard_size) for shard in range(len(seeds))]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(seeds)))
+
+    qualification_counts = np.zeros(len(fixtures.teams), dtype=np.int64)
+    store = ScenarioStore(fixtures, qualifying_points) if keep_scenarios else None
+    sinks = list(collectors) + ([store] if store is not None else [])
+    # Every shard fills its own empty copies, merged back here in shard order
+    shard_sinks = ([sink.empty_copy() for sink in sinks] for _ in seeds)
+    shard_args = (repeat(fixtures), repeat(qualifying_points), seeds, sizes, shard_sinks, repeat(probabilities))
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = pool.map(_run_shard, *shard_args) if pool else map(_run_shard, *shard_args)
+        for counts, filled_sinks in results:
+            qualification_counts += counts
+            for sink, filled in zip(sinks, filled_sinks):
+                sink.merge(filled)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return to_percentages(fixtures, qualification_counts, simulations), store
@@ -0,0 +1,278 @@
+import math
+import os
+from collections import namedtuple
+from itertools import combinations
+
+import numpy as np
+
+from .adaptive import simulations_for_width
+from .gray_code import run_gray_code_enumeration, run_gray_code_histogram
+from .leverage import LeverageTable
+from .parallel import run_parallel_monte_carlo
+from .points_distribution import run_exact_marginals
+from .positions import PositionTable
+from .state_dp import run_state_dp
+from .thresholds import PointsHistogram, histogram_from_marginals
+from .vectorized import run_vectorized_monte_carlo
+
+# What a run can be asked for:
+#   qualification  P(points >= qualifying points) per team
+#   thresholds     full points histogram, for any qualifying threshold
+#   top            top-k split per team (PositionTable.top_percentages)
+#   positions      full final-position distribution
+#   leverage       per-match swing in each team's top-k chances
+#   scenarios      a ScenarioStore of the scenarios themselves, for export
+OUTPUTS = ('qualification', 'thresholds', 'top', 'positions', 'leverage', 'scenarios')
+
+# Per-scenario costs in seconds on one core, measured on a 10-team league with
+# benchmark.py; the planner only needs them to the right order of magnitude
+GRAY_COUNT_COST = 3e-10        # counts and histograms: per-team sums over whole Gray-code blocks
+POSITION_COST = 1.7e-6         # PositionTable, for a 10-team league (grows with teams squared)
+LEVERAGE_COST = 1.5e-6         # LeverageTable
+STORE_COST = 1.5e-7            # keeping a scenario in a ScenarioStore
+SAMPLE_COST = 1.5e-7           # drawing a Monte Carlo scenario, plus this much per match
+SAMPLE_MATCH_COST = 7e-9
+STATE_COST = 2e-7              # state_dp, per points table estimated_states counts
+FIXED_COST = 0.005             # setting up any run
+PROCESS_COST = 0.3             # starting a process pool
+# Exact enumeration keeps scenarios up to this many matches (16M scenarios, ~100MB)
+SCENARIO_MATCH_LIMIT = 22
+
+# A backend behind the common interface: run(fixtures, qualifying_points, outputs, options) -> EngineResult
+Engine = namedtuple('Engine', ['name', 'exact', 'outputs', 'cost', 'run'])
+# What a run produced; fields an engine was not asked for (or cannot give) are None
+EngineResult = namedtuple('EngineResult', ['qualification', 'histogram', 'top', 'positions', 'leverage', 'store'])
+# Settings shared by every engine in a plan
+RunOptions = namedtuple('RunOptions', ['simulations', 'seed', 'workers', 'probabilities', 'top'])
+# engines: [(engine name, outputs it produces)], run in order; candidates: every plan considered,
+# as (engine names, estimated seconds, exact, optional outputs covered)
+Plan = namedtuple('Plan', ['engines', 'seconds', 'exact', 'simulations', 'reason', 'candidates'])
+
+
+def _team_factor(fixtures):
+    return (len(fixtures.teams) / 10) ** 2
+
+
+def _collector_cost(fixtures, outputs):
+    cost = 0.0
+    if outputs & {'top', 'positions'}:
+        cost += POSITION_COST * _team_factor(fixtures)
+    if 'leverage' in outputs:
+        cost += LEVERAGE_COST
+    if 'scenarios' in outputs:
+        cost += STORE_COST
+    return cost
+
+
+# Number of distinct final points tables state_dp will hold: the product of each
+# team's possible win counts, thinned by the fact that wins must add up to the
+# match count (roughly one in sqrt(2 pi var) vectors has the right total)
+def estimated_states(fixtures):
+    team_count = len(fixtures.teams)
+    own = np.bincount(fixtures.home, minlength=team_count) + np.bincount(fixtures.away, minlength=team_count)
+    log_product = float(np.log(own + 1.0).sum())
+    variance = float(((own + 1.0) ** 2 - 1).sum() / 12)
+    log_states = log_product - 0.5 * math.log(2 * math.pi * max(variance, 1.0))
+    return math.exp(min(log_states, len(fixtures.home) * math.log(2), 700))
+
+
+def _gray_cost(fixtures, outputs, options):
+    scenarios = 2.0 ** len(fixtures.home)
+    per_scenario = _collector_cost(fixtures, outputs) or GRAY_COUNT_COST
+    workers = options.workers or 1
+    return FIXED_COST + scenarios * per_scenario / workers + (PROCESS_COST if workers > 1 else 0)
+
+
+def _state_dp_cost(fixtures, outputs, options):
+    per_state = STATE_COST + (POSITION_COST * _team_factor(fixtures) if 'positions' in outputs else 0)
+    return FIXED_COST + estimated_states(fixtures) * per_state
+
+
+def _marginals_cost(fixtures, outputs, options):
+    return FIXED_COST
+
+
+def _sample_cost(fixtures, outputs, options):
+    per_sample = SAMPLE_COST + SAMPLE_MATCH_COST * len(fixtures.home) + _collector_cost(fixtures, outputs)
+    return FIXED_COST + options.simulations * per_sample
+
+
+def _parallel_cost(fixtures, outputs, options):
+    workers = options.workers or 1
+    return _sample_cost(fixtures, outputs, options) / workers + PROCESS_COST
+
+
+def _collectors(fixtures, outputs, options):
+    positions = PositionTable(fixtures, options.top) if outputs & {'top', 'positions'} else None
+    leverage = LeverageTable(fixtures, top=options.top) if 'leverage' in outputs else None
+    histogram = PointsHistogram(fixtures) if 'thresholds' in outputs else None
+    return positions, leverage, histogram
+
+
+def _result(qualification=None, histogram=None, positions=None, leverage=None, store=None, top=None):
+    if top is None and positions is not None:
+        top = positions.top_percentages()
+    return EngineResult(qualification, histogram, top, positions, leverage, store)
+
+
+def _run_gray(fixtures, qualifying_points, outputs, options):
+    positions, leverage, _ = _collectors(fixtures, outputs, options)
+    qualification, store = run_gray_code_enumeration(
+        fixtures, qualifying_points, workers=options.workers, keep_scenarios='scenarios' in outputs,
+        collectors=[c for c in (positions, leverage) if c is not None], probabilities=options.probabilities)
+    histogram = None
+    if 'thresholds' in outputs:
+        histogram = run_gray_code_histogram(fixtures, workers=options.workers, probabilities=options.probabilities)
+    return _result(qualification, histogram, positions, leverage, store)
+
+
+def _run_state_dp(fixtures, qualifying_points, outputs, options):
+    top, positions = run_state_dp(fixtures, options.top, prune='positions' not in outputs,
+                                  probabilities=options.probabilities)
+    return _result(positions=positions, top=top)
+
+
+def _run_marginals(fixtures, qualifying_points, outputs, options):
+    qualification, distributions = run_exact_marginals(fixtures, qualifying_points,
+                                                       probabilities=options.probabilities)
+    return _result(qualification, histogram_from_marginals(fixtures, distributions))
+
+
+def _run_vectorized(fixtures, qualifying_points, outputs, options):
+    collectors = _collectors(fixtures, outputs, options)
+    qualification, store = run_vectorized_monte_carlo(
+        fixtures, qualifying_points, options.simulations, seed=options.seed,
+        keep_scenarios='scenarios' in outputs, collectors=[c for c in collectors if c is not None],
+        probabilities=options.probabilities)
+    return _result(qualification, collectors[2], collectors[0], collectors[1], store)
+
+
+def _run_parallel(fixtures, qualifying_points, outputs, options):
+    collectors = _collectors(fixtures, outputs, options)
+    qualification, store = run_parallel_monte_carlo(
+        fixtures, qualifying_points, options.simulations, seed=options.seed, workers=options.workers,
+        keep_scenarios='scenarios' in outputs, collectors=[c for c in collectors if c is not None],
+        probabilities=options.probabilities)
+    return _result(qualification, collectors[2], collectors[0], collectors[1], store)
+
+
+ENGINES = {
+    engine.name: engine for engine in [
+        Engine('exact_enumeration', True, frozenset(OUTPUTS), _gray_cost, _run_gray),
+        Engine('state_dp', True, frozenset({'top', 'positions'}), _state_dp_cost, _run_state_dp),
+        Engine('exact_marginals', True, frozenset({'qualification', 'thresholds'}), _marginals_cost, _run_marginals),
+        Engine('vectorized', False, frozenset(OUTPUTS), _sample_cost, _run_vectorized),
+        Engine('parallel', False, frozenset(OUTPUTS), _parallel_cost, _run_parallel),
+    ]
+}
+
+
+def _can_produce(engine, fixtures, outputs):
+    if not outputs <= engine.outputs:
+        return False
+    return not (engine.name == 'exact_enumeration' and 'scenarios' in outputs
+                and len(fixtures.home) > SCENARIO_MATCH_LIMIT)
+
+
+# Every way to cover the outputs with one engine, or two when neither covers them alone
+def _assignments(fixtures, outputs, names):
+    engines = [ENGINES[name] for name in names]
+    for engine in engines:
+        if _can_produce(engine, fixtures, outputs):
+            yield [(engine, outputs)]
+    for first, second in combinations(engines, 2):
+        if first.exact != second.exact or outputs <= first.outputs or outputs <= second.outputs:
+            continue
+        first_outputs = outputs & first.outputs
+        second_outputs = outputs - first_outputs
+        if second_outputs and _can_produce(first, fixtures, first_outputs) \
+                and _can_produce(second, fixtures, second_outputs):
+            yield [(first, first_outputs), (second, second_outputs)]
+
+
+# Pick the engines for a run from their estimated costs. `outputs` must all be
+# produced; `optional` ones are added when a plan can afford them. Monte Carlo
+# plans are considered only with a precision target (the widest acceptable 95%
+# interval, as a fraction) or an explicit simulation count. Ranking, in order:
+# plans within `time_budget` seconds first, exact before sampled, more optional
+# outputs, then the fastest. `engines` limits the choice to some backends.
+def plan_run(fixtures, outputs, optional=(), precision=None, simulations=None, workers=1, time_budget=None,
+             engines=None):
+    outputs, optional = frozenset(outputs), frozenset(optional) - frozenset(outputs)
+    unknown = (outputs | optional) - set(OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown outputs: {sorted(unknown)}")
+    if simulations is None and precision is not None:
+        simulations = simulations_for_width(precision)
+    names = [name for name in (engines or ENGINES)
+             if ENGINES[name].exact or simulations is not None]
+    options = RunOptions(simulations, None, workers or os.cpu_count() or 1, None, 4)
+
+    candidates = []
+    for extra in {optional, frozenset()}:
+        for assignment in _assignments(fixtures, outputs | extra, names):
+            seconds = sum(engine.cost(fixtures, engine_outputs, options) for engine, engine_outputs in assignment)
+            exact = all(engine.exact for engine, _ in assignment)
+            candidates.append((assignment, seconds, exact, extra))
+    if not candidates:
+        raise ValueError(f"No engine can produce {sorted(outputs)} for {len(fixtures.home)} matches"
+                         + ("" if simulations is not None else " exactly; give a precision target"))
+
+    def rank(candidate):
+        _, seconds, exact, extra = candidate
+        over_budget = time_budget is not None and seconds > time_budget
+        return over_budget, not exact, -len(extra), seconds
+
+    candidates.sort(key=rank)
+    assignment, seconds, exact, extra = candidates[0]
+    return Plan(
+        engines=[(engine.name, set(engine_outputs)) for engine, engine_outputs in assignment],
+        seconds=seconds,
+        exact=exact,
+        simulations=None if exact else simulations,
+        reason=_reason(fixtures, candidates[0], precision, simulations, time_budget,
+                       any(exact for _, _, exact, _ in candidates)),
+        candidates=[(tuple(engine.name for engine, _ in a), s, e, sorted(x)) for a, s, e, x in candidates],
+    )
+
+
+def _reason(fixtures, candidate, precision, simulations, time_budget, exact_available):
+    assignment, seconds, exact, extra = candidate
+    match_count = len(fixtures.home)
+    steps = []
+    for engine, engine_outputs in assignment:
+        if engine.name == 'exact_enumeration':
+            what = f"all 2^{match_count} = {2 ** match_count:,} outcomes"
+        elif engine.name == 'state_dp':
+            what = f"about {estimated_states(fixtures):,.0f} distinct points tables"
+        elif engine.name == 'exact_marginals':
+            what = "each team's own points distribution"
+        else:
+            what = f"{simulations:,} simulations"
+        steps.append(f"{engine.name} over {what} for {', '.join(sorted(engine_outputs))}")
+    reason = f"{'; '.join(steps)}; estimated {seconds:.2f}s"
+    if not exact and not exact_available:
+        reason += ", the fastest sampler allowed"
+    elif not exact:
+        reason += (f", no exact plan fits the {time_budget:g}s budget" if time_budget is not None
+                   else ", faster than any exact plan")
+        if precision is not None:
+            reason += f" and a 95% interval of at most ±{precision * 50:g}% is enough"
+    elif time_budget is not None and seconds > time_budget:
+        reason += f", over the {time_budget:g}s budget but nothing cheaper qualifies"
+    else:
+        reason += ", the fastest exact plan" + (f" that also gives {', '.join(sorted(extra))}" if extra else "")
+    return reason
+
+
+# Run a plan's engines and combine what they produced
+def run_plan(plan, fixtures, qualifying_points, seed=None, workers=1, probabilities=None, top=4):
+    options = RunOptions(plan.simulations, seed, workers, probabilities, top)
+    combined = _result()
+    for name, outputs in plan.engines:
+        result = ENGINES[name].run(fixtures, qualifying_points, frozenset(outputs), options)
+        combined = combined._replace(**{
+            field: value for field, value in result._asdict().items()
+            if value is not None and getattr(combined, field) is None
+        })
+    return combined
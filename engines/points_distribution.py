@@ -0,0 +1,35 @@
+import numpy as np
+
+from .fixtures import to_percentages
+
+
+# Exact distribution of one team's final points. Only the team's own remaining
+# fixtures matter, so per-match [loss, tie, win] distributions are convolved in
+# O(matches x points). Entry i is the probability of finishing on base + i points.
+# `probabilities` holds each match's home-win probability given it is decided.
+def team_points_distribution(fixtures, team_idx, tie_probability=0.0, probabilities=None):
+    distribution = np.ones(1)
+    own_matches = np.flatnonzero((fixtures.home == team_idx) | (fixtures.away == team_idx))
+    for match in own_matches.tolist():
+        home_probability = 0.5 if probabilities is None else probabilities[match]
+        win_probability = home_probability if fixtures.home[match] == team_idx else 1 - home_probability
+        win_probability *= 1 - tie_probability
+        step = np.array([1 - tie_probability - win_probability, tie_probability, win_probability])
+        distribution = np.convolve(distribution, step)
+    return distribution
+
+
+# Exact marginal mode: every team's full points distribution and the probability
+# of reaching qualifying_points, without enumerating or sampling joint outcomes.
+# Ties score 1 point each, as load_data does for a 'TIE' result.
+def run_exact_marginals(fixtures, qualifying_points, tie_probability=0.0, probabilities=None):
+    distributions = {}
+    qualification_probabilities = np.zeros(len(fixtures.teams))
+
+    for team_idx, team in enumerate(fixtures.teams):
+        distribution = team_points_distribution(fixtures, team_idx, tie_probability, probabilities)
+        points = int(fixtures.base_points[team_idx]) + np.arange(len(distribution))
+        distributions[team] = {p: prob for p, prob in zip(points.tolist(), distribution.tolist()) if prob > 0}
+        qualification_probabilities[team_idx] = distribution[points >= qualifying_points].sum()
+
+    return to_percentages(fixtures, qualification_probabilities, 1), distributions
@@ -0,0 +1,74 @@
+import numpy as np
+
+CHUNK_SIZE = 1 << 16
+
+
+# Final-position distribution for every team, accumulated batch by batch from
+# simulated points. Tie-break: teams level on points share their block of
+# positions equally (as a uniformly random net run rate would), and for the
+# top-k cut a team is counted either outright (every tied slot inside the top k)
+# or shared (its tied block straddles the cut). Batches may carry per-scenario
+# weights (exact enumeration under a probability model); totals are then masses.
+class PositionTable:
+    def __init__(self, fixtures, top=4):
+        self.fixtures = fixtures
+        self.top = top
+        team_count = len(fixtures.teams)
+        self.position_mass = np.zeros((team_count, team_count))
+        self.top_outright = np.zeros(team_count)
+        self.top_shared = np.zeros(team_count)
+        self.total = 0.0
+
+    def empty_copy(self):
+        return PositionTable(self.fixtures, self.top)
+
+    def merge(self, other):
+        self.position_mass += other.position_mass
+        self.top_outright += other.top_outright
+        self.top_shared += other.top_shared
+        self.total += other.total
+
+    # Sum the batch on its own first, so a batch adds the same amounts whether it
+    # lands here directly or in a worker's copy that is merged later
+    def add_batch(self, outcomes, points, weights=None):
+        batch = self.empty_copy()
+        for start in range(0, len(points), CHUNK_SIZE):
+            chunk_weights = None if weights is None else weights[start:start + CHUNK_SIZE]
+            batch._add_chunk(np.asarray(points[start:start + CHUNK_SIZE], dtype=np.int16), chunk_weights)
+        self.merge(batch)
+
+    def _add_chunk(self, points, weights=None):
+        team_count = points.shape[1]
+        # above[s, t]: teams strictly ahead of t; level[s, t]: teams level with t, itself included
+        above = (points[:, None, :] > points[:, :, None]).sum(axis=2)
+        level = (points[:, None, :] == points[:, :, None]).sum(axis=2)
+
+        # Spread 1/level over positions above .. above + level - 1
+        share = 1.0 / level
+        if weights is None:
+            weights = np.ones(len(points))
+        else:
+            share = share * weights[:, None]
+        slots = np.arange(team_count) * team_count + above
+        for step in range(int(level.max())):
+            inside = level > step
+            self.position_mass += np.bincount(
+                (slots + step)[inside], share[inside], minlength=team_count * team_count
+            ).reshape(team_count, team_count)
+
+        self.top_outright += weights @ (above + level <= self.top)
+        self.top_shared += weights @ ((above < self.top) & (above + level > self.top))
+        self.total += weights.sum()
+
+    # {team: [P(1st) %, ..., P(last) %]}
+    def position_percentages(self):
+        return {
+            team: (row / self.total * 100).tolist()
+            for team, row in zip(self.fixtures.teams, self.position_mass)
+        }
+
+    # {team: (P(top k) %, P(top k outright) %, P(level on points at the cut) %)}
+    def top_percentages(self):
+        top_split = self.position_mass[:, :self.top].sum(axis=1)
+        columns = np.stack([top_split, self.top_outright, self.top_shared], axis=1) / self.total * 100
+        return {team: tuple(row) for team, row in zip(self.fixtures.teams, columns.tolist())}
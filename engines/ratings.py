@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+
+
+# Per-match home-win probability model. P(home wins) =
+# 1 / (1 + exp(-(rating[home] - rating[away] + home_advantage) / scale)).
+# probabilities() compiles it to one vector aligned with the fixtures, which is
+# what every engine takes as `probabilities`.
+class RatingModel:
+    def __init__(self, ratings, home_advantage=0.0, scale=1.0):
+        self.ratings = dict(ratings)
+        self.home_advantage = home_advantage
+        self.scale = scale
+
+    def probability(self, home_team, away_team):
+        difference = self.ratings.get(home_team, 0.0) - self.ratings.get(away_team, 0.0) + self.home_advantage
+        return 1 / (1 + math.exp(-difference / self.scale))
+
+    def probabilities(self, fixtures):
+        ratings = np.array([self.ratings.get(team, 0.0) for team in fixtures.teams])
+        difference = ratings[fixtures.home] - ratings[fixtures.away] + self.home_advantage
+        return 1 / (1 + np.exp(-difference / self.scale))
+
+
+# (home team, away team, home won) for every decided match, oldest schedule first
+def _decided_matches(schedules):
+    decided = []
+    for schedule in schedules:
+        for home, away, result in zip(schedule['Home Team'], schedule['Away Team'], schedule['Result']):
+            if isinstance(result, str) and result in (home, away):
+                decided.append((home, away, result == home))
+    return decided
+
+
+# Elo ratings run over the completed results in order, on the usual 400-point scale
+def fit_elo(schedules, k=20.0, home_advantage=0.0, initial=1500.0):
+    model = RatingModel({}, home_advantage, scale=400 / math.log(10))
+    for home, away, home_won in _decided_matches(schedules):
+        model.ratings.setdefault(home, initial)
+        model.ratings.setdefault(away, initial)
+        change = k * (home_won - model.probability(home, away))
+        model.ratings[home] += change
+        model.ratings[away] -= change
+    return model
+
+
+# Bradley-Terry with a home-advantage term, fitted by Newton's method on the
+# logistic likelihood. The ridge penalty pulls ratings towards 0 so a short
+# season cannot produce extreme probabilities. Matches from earlier schedules are
+# down-weighted by season_decay per season.
+def fit_bradley_terry(schedules, ridge=1.0, season_decay=0.5, iterations=25):
+    teams = sorted({team for schedule in schedules for team in schedule['Home Team']} |
+                   {team for schedule in schedules for team in schedule['Away Team']})
+    team_index = {team: i for i, team in enumerate(teams)}
+
+    rows, targets, weights = [], [], []
+    for age, schedule in enumerate(reversed(schedules)):
+        for home, away, home_won in _decided_matches([schedule]):
+            row = np.zeros(len(teams) + 1)
+            row[team_index[home]] += 1
+            row[team_index[away]] -= 1
+            row[-1] = 1  # home advantage
+            rows.append(row)
+            targets.append(float(home_won))
+            weights.append(season_decay ** age)
+
+    params = np.zeros(len(teams) + 1)
+    if rows:
+        x, y, w = np.array(rows), np.array(targets), np.array(weights)
+        penalty = np.full(len(params), ridge)
+        penalty[-1] = ridge * 1e-3  # barely shrink the home-advantage term
+        for _ in range(iterations):
+            p = 1 / (1 + np.exp(-x @ params))
+            gradient = x.T @ (w * (y - p)) - penalty * params
+            hessian = (x * (w * p * (1 - p))[:, None]).T @ x + np.diag(penalty)
+            params += np.linalg.solve(hessian, gradient)
+
+    return RatingModel(dict(zip(teams, params[:-1].tolist())), float(params[-1]))
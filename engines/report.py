@@ -0,0 +1,135 @@
+import html
+
+import numpy as np
+
+from .positions import PositionTable
+
+CHUNK_SIZE = 1 << 16
+MOST_LIKELY_TABLES = 10
+SCENARIO_SAMPLE_SIZE = 50
+
+_STYLE = """
+    body { font-family: Arial, sans-serif; padding: 20px; }
+    h1 { color: #222; }
+    h2 { margin-top: 40px; color: #333; }
+    table { border-collapse: collapse; margin-bottom: 40px; }
+    th, td { border: 1px solid #ccc; padding: 6px 8px; text-align: left; }
+    th { background-color: #f2f2f2; }
+    .bar { background-color: #4a90d9; height: 10px; display: inline-block; }
+"""
+
+
+def _table(headers, rows):
+    head = ''.join(f'<th>{html.escape(str(cell))}</th>' for cell in headers)
+    body = ''.join('<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>\n' for row in rows)
+    return f'<table>\n<tr>{head}</tr>\n{body}</table>\n'
+
+
+def _bar(percentage):
+    return f'<span class="bar" style="width:{percentage:.0f}px"></span> {percentage:.2f}%'
+
+
+# Distinct final points tables and how many simulations (or how much weight)
+# ended on each. Rows are merged chunk by chunk, so memory follows the number
+# of distinct tables rather than the number of simulations.
+def _table_frequencies(points, weights):
+    row_type = np.dtype((np.void, points.shape[1]))
+    tables = np.zeros(0, dtype=row_type)
+    mass = np.zeros(0)
+    for start in range(0, len(points), CHUNK_SIZE):
+        chunk = np.ascontiguousarray(points[start:start + CHUNK_SIZE]).view(row_type).ravel()
+        chunk_mass = np.ones(len(chunk)) if weights is None else weights[start:start + CHUNK_SIZE]
+        merged, inverse = np.unique(np.concatenate([tables, chunk]), return_inverse=True)
+        mass = np.bincount(inverse.ravel(), np.concatenate([mass, chunk_mass]), minlength=len(merged))
+        tables = merged
+    return tables.view(np.uint8).reshape(-1, points.shape[1]), mass
+
+
+# Per-team histogram of final points, as fractions
+def _points_histogram(points, weights):
+    histogram = np.zeros((points.shape[1], 256))
+    for start in range(0, len(points), CHUNK_SIZE):
+        chunk = points[start:start + CHUNK_SIZE]
+        chunk_weights = None if weights is None else weights[start:start + CHUNK_SIZE]
+        for team in range(points.shape[1]):
+            histogram[team] += np.bincount(chunk[:, team], chunk_weights, minlength=256)
+    return histogram / histogram[0].sum()
+
+
+# Write an HTML report of a ScenarioStore straight to disk: the starting table,
+# final position distributions, points histograms, the most likely final tables
+# and a handful of individual scenarios. Scenarios are a seeded random sample of
+# `sample_size`, or with `page` set, simulations page*sample_size onwards.
+# Pass the PositionTable the engine already filled to skip recomputing it.
+def write_html_report(store, output_path, positions=None, sample_size=SCENARIO_SAMPLE_SIZE, page=None,
+                      most_likely=MOST_LIKELY_TABLES, seed=0):
+    fixtures = store.fixtures
+    teams = fixtures.teams
+    points, weights = store.points, store.weights
+    total = len(store) if weights is None else weights.sum()
+
+    if positions is None:
+        positions = PositionTable(fixtures)
+        for start in range(0, len(points), CHUNK_SIZE):
+            chunk_weights = None if weights is None else weights[start:start + CHUNK_SIZE]
+            positions.add_batch(None, points[start:start + CHUNK_SIZE], chunk_weights)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(f'<html>\n<head>\n<meta charset="utf-8">\n<title>Simulation Report</title>\n'
+                f'<style>{_STYLE}</style>\n</head>\n<body>\n<h1>Simulated Points Table Results</h1>\n')
+        kind = 'weighted scenarios' if weights is not None else 'simulations'
+        f.write(f'<p>{len(store):,} {kind} of {len(fixtures.home)} remaining matches; '
+                f'qualifying points {store.qualifying_points}.</p>\n')
+
+        order = np.argsort(-fixtures.base_points, kind='stable')
+        f.write('<h2>Current Points Table (Before Simulations)</h2>\n')
+        f.write(_table(['Team', 'Points'], [[html.escape(teams[t]), int(fixtures.base_points[t])] for t in order]))
+
+        if total:
+            top = positions.top
+            position_percentages = positions.position_percentages()
+            top_percentages = positions.top_percentages()
+            qualifying = points >= store.qualifying_points
+            qualify = qualifying.sum(axis=0) if weights is None else weights @ qualifying
+            rows = []
+            for t in sorted(range(len(teams)), key=lambda t: top_percentages[teams[t]][0], reverse=True):
+                rows.append([html.escape(teams[t]), _bar(100 * qualify[t] / total), _bar(top_percentages[teams[t]][0])]
+                            + [f'{percentage:.1f}%' for percentage in position_percentages[teams[t]]])
+            f.write('<h2>Final Position Probabilities</h2>\n'
+                    '<p>Teams level on points share their positions equally.</p>\n')
+            f.write(_table(['Team', f'≥ {store.qualifying_points} points', f'Top {top}']
+                           + [str(position) for position in range(1, len(teams) + 1)], rows))
+
+            histogram = _points_histogram(points, weights)
+            reached = np.flatnonzero(histogram.sum(axis=0))
+            columns = np.arange(reached.min(), reached.max() + 1)
+            f.write('<h2>Final Points Distribution</h2>\n')
+            f.write(_table(['Team'] + [str(value) for value in columns], [
+                [html.escape(teams[t])] + [f'{100 * histogram[t, value]:.1f}%' if histogram[t, value] else ''
+                                           for value in columns]
+                for t in order
+            ]))
+
+            tables, mass = _table_frequencies(points, weights)
+            f.write(f'<h2>Most Likely Final Tables</h2>\n<p>{len(tables):,} distinct final tables.</p>\n')
+            for rank, index in enumerate(np.argsort(-mass, kind='stable')[:most_likely], start=1):
+                table_order = np.argsort(-tables[index].astype(np.int16), kind='stable')
+                f.write(f'<h3>#{rank}: {100 * mass[index] / total:.3f}%</h3>\n')
+                f.write(_table(['Team', 'Points'], [[html.escape(teams[t]), int(tables[index, t])] for t in table_order]))
+
+        # Individual scenarios, decoded only for the ones shown
+        if page is None:
+            rng = np.random.default_rng(seed)
+            sim_nums = np.sort(rng.choice(len(store), size=min(sample_size, len(store)), replace=False))
+            f.write(f'<h2>Sample of {len(sim_nums)} Scenarios</h2>\n')
+        else:
+            sim_nums = np.arange(page * sample_size, min((page + 1) * sample_size, len(store)))
+            f.write(f'<h2>Scenarios, page {page + 1} of {-(-len(store) // sample_size)}</h2>\n')
+        for sim_num, game_results in store.iter_game_results(sim_nums):
+            table_order = np.argsort(-points[sim_num].astype(np.int16), kind='stable')
+            f.write(f'<h3>Simulation {sim_num}</h3>\n')
+            f.write(_table(['Team', 'Points'], [[html.escape(teams[t]), int(points[sim_num, t])] for t in table_order]))
+            f.write(_table(['Match', 'Winner'], [[html.escape(match), html.escape(winner)]
+                                                 for match, winner in game_results]))
+
+        f.write('</body>\n</html>\n')
@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+import os
+
+import numpy as np
+
+from .fixtures import Fixtures, match_labels
+from .scenario_store import ScenarioStore
+
+MAGIC = b'IPLSIMS1'
+# Records start on a multiple of this many bytes after the header
+HEADER_ALIGN = 64
+EXPORT_CHUNK_SIZE = 1 << 14
+
+
+# One fixed-size record per simulation: packed outcome bits (bit j = home win in
+# match j, little bit order), every team's final points and, for weighted
+# enumerations, the scenario's probability
+def record_dtype(match_count, team_count, weighted=False):
+    fields = [('bits', np.uint8, ((match_count + 7) // 8,)), ('points', np.uint8, (team_count,))]
+    if weighted:
+        fields.append(('weight', '<f8'))
+    return np.dtype(fields)
+
+
+# Binary simulation store on disk: MAGIC, a uint32 header length and a JSON
+# header with the fixtures, then records appended in bulk. Works as an engine
+# collector, so simulations stream to disk batch by batch; parallel shards
+# fill in-memory ScenarioStores that are appended when merged.
+class ScenarioFile:
+    def __init__(self, path, fixtures, qualifying_points, weighted=False):
+        self.path = path
+        self.fixtures = fixtures
+        self.qualifying_points = qualifying_points
+        self.dtype = record_dtype(len(fixtures.home), len(fixtures.teams), weighted)
+        self.records = 0
+
+        header = json.dumps({
+            'teams': list(fixtures.teams),
+            'base_points': fixtures.base_points.tolist(),
+            'home': fixtures.home.tolist(),
+            'away': fixtures.away.tolist(),
+            'match_numbers': fixtures.match_numbers.tolist(),
+            'qualifying_points': qualifying_points,
+            'weighted': weighted,
+        }).encode('utf-8')
+        length = len(MAGIC) + 4 + len(header)
+        header += b' ' * (-length % HEADER_ALIGN)
+        with open(path, 'wb') as f:
+            f.write(MAGIC + np.uint32(len(header)).tobytes() + header)
+
+    def __len__(self):
+        return self.records
+
+    def add_batch(self, outcomes, points=None, weights=None):
+        batch = ScenarioStore(self.fixtures, self.qualifying_points)
+        batch.add_batch(outcomes, points, weights)
+        self.merge(batch)
+
+    def empty_copy(self):
+        return ScenarioStore(self.fixtures, self.qualifying_points)
+
+    # Append every simulation of an in-memory ScenarioStore with one write
+    def merge(self, store):
+        records = np.empty(len(store), dtype=self.dtype)
+        records['bits'] = store.bits
+        records['points'] = store.points
+        if 'weight' in self.dtype.names:
+            records['weight'] = store.weights
+        with open(self.path, 'ab') as f:
+            f.write(records.tobytes())
+        self.records += len(records)
+
+
+# Write an in-memory ScenarioStore to a new scenario file
+def save_scenarios(store, path):
+    scenario_file = ScenarioFile(path, store.fixtures, store.qualifying_points, store.weights is not None)
+    scenario_file.merge(store)
+    return scenario_file
+
+
+def _read_header(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a scenario file")
+        length = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+        header = json.loads(f.read(length))
+    return header, len(MAGIC) + 4 + length
+
+
+# Open a scenario file as a ScenarioStore whose bits, points and weights are
+# views into a read-only numpy.memmap; nothing is read until it is queried
+def open_scenarios(path):
+    header, offset = _read_header(path)
+    fixtures = Fixtures(
+        teams=header['teams'],
+        base_points=np.array(header['base_points'], dtype=np.int16),
+        home=np.array(header['home'], dtype=np.intp),
+        away=np.array(header['away'], dtype=np.intp),
+        match_numbers=np.array(header['match_numbers'], dtype=np.int64),
+    )
+    dtype = record_dtype(len(fixtures.home), len(fixtures.teams), header['weighted'])
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    if count:
+        records = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+    else:
+        records = np.zeros(0, dtype=dtype)
+    weights = records['weight'] if header['weighted'] else None
+    return ScenarioStore.from_arrays(fixtures, header['qualifying_points'], records['bits'], records['points'], weights)
+
+
+# Stream every simulation of a store to the one-row-per-(simulation, match) CSV
+# layout csv.writer produces. Each match's two possible rows are formatted once;
+# a simulation is then a single join of its rows, prefixed by its number.
+def export_csv(store, csv_path, chunk_size=EXPORT_CHUNK_SIZE):
+    fixtures = store.fixtures
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['Simulation Number', 'Match', 'Winner'])
+    rows = np.empty((len(fixtures.home), 2), dtype=object)
+    for j, (label, home, away) in enumerate(zip(match_labels(fixtures), fixtures.home, fixtures.away)):
+        for outcome, winner in ((0, away), (1, home)):
+            rows[j, outcome] = _csv_line(label, fixtures.teams[winner])
+
+    match_rows = np.arange(len(fixtures.home))
+    with open(csv_path, 'w', newline='') as f:
+        f.write(buffer.getvalue())
+        for start in range(0, len(store), chunk_size):
+            sim_nums = np.arange(start, min(start + chunk_size, len(store)))
+            chosen = rows[match_rows, store.outcomes(sim_nums).astype(np.intp)]
+            f.write(''.join(str(sim_num).join([''] + row) for sim_num, row in zip(sim_nums.tolist(), chosen.tolist())))
+
+
+# ",match,winner\r\n" exactly as csv.writer would write the tail of the row
+def _csv_line(label, winner):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(['', label, winner])
+    return buffer.getvalue()
@@ -0,0 +1,152 @@
+import numpy as np
+
+from .fixtures import compile_fixtures, final_points, match_labels, winner_names
+
+CSV_CHUNK_SIZE = 1 << 16
+
+
+# Compact record of every simulation: one packed bitmask row per simulation
+# (bit j = home win in remaining match j) plus a uint8 final points row.
+# Row i is simulation number i. Game results are only decoded when exported.
+# Exact enumeration under a probability model also records each scenario's weight.
+class ScenarioStore:
+    def __init__(self, fixtures, qualifying_points):
+        self.fixtures = fixtures
+        self.qualifying_points = qualifying_points
+        self._bit_batches = []
+        self._point_batches = []
+        self._weight_batches = []
+        self._bits = None
+        self._points = None
+        self._qualifying = {}
+
+    # Append a batch of simulations; points are recomputed when not supplied
+    def add_batch(self, outcomes, points=None, weights=None):
+        if points is None:
+            points = final_points(self.fixtures, outcomes)
+        if len(points) and (points.min() < 0 or points.max() > 255):
+            raise ValueError("Final points do not fit in a uint8 points row")
+        self._bit_batches.append(np.packbits(outcomes, axis=1, bitorder='little'))
+        self._point_batches.append(points.astype(np.uint8))
+        if weights is not None:
+            self._weight_batches.append(np.asarray(weights, dtype=np.float64))
+        self._bits = self._points = None
+        self._qualifying = {}
+
+    # Store over existing packed bits and points rows, e.g. memory-mapped from a scenario file
+    @classmethod
+    def from_arrays(cls, fixtures, qualifying_points, bits, points, weights=None):
+        store = cls(fixtures, qualifying_points)
+        store._bits, store._points = bits, points
+        store._bit_batches, store._point_batches = [bits], [points]
+        store._weight_batches = [] if weights is None else [weights]
+        return store
+
+    def empty_copy(self):
+        return ScenarioStore(self.fixtures, self.qualifying_points)
+
+    # Append every simulation of another store built for the same fixtures
+    def merge(self, other):
+        self._bit_batches.extend(other._bit_batches)
+        self._point_batches.extend(other._point_batches)
+        self._weight_batches.extend(other._weight_batches)
+        self._bits = self._points = None
+        self._qualifying = {}
+
+    def _consolidate(self):
+        if self._bits is None:
+            width = (len(self.fixtures.home) + 7) // 8
+            self._bits = np.concatenate(self._bit_batches) if self._bit_batches else np.zeros((0, width), np.uint8)
+            teams = len(self.fixtures.teams)
+            self._points = np.concatenate(self._point_batches) if self._point_batches else np.zeros((0, teams), np.uint8)
+            self._bit_batches = [self._bits]
+            self._point_batches = [self._points]
+
+    def __len__(self):
+        return sum(len(batch) for batch in self._point_batches)
+
+    # Teams with at least one qualifying simulation, like the keys of the old team_scenarios
+    def __contains__(self, team_name):
+        return team_name in self.fixtures.teams and len(self.qualifying_indices(team_name)) > 0
+
+    @property
+    def bits(self):
+        self._consolidate()
+        return self._bits
+
+    @property
+    def points(self):
+        self._consolidate()
+        return self._points
+
+    # Per-scenario weights, or None when every simulation counts once
+    @property
+    def weights(self):
+        if not self._weight_batches:
+            return None
+        if len(self._weight_batches) > 1:
+            self._weight_batches = [np.concatenate(self._weight_batches)]
+        return self._weight_batches[0]
+
+    # Boolean outcome matrix for the given simulation numbers
+    def outcomes(self, sim_nums):
+        match_count = len(self.fixtures.home)
+        return np.unpackbits(self.bits[sim_nums], axis=1, count=match_count, bitorder='little').astype(bool)
+
+    # Simulation numbers in which team_name reaches the qualifying points
+    def qualifying_indices(self, team_name):
+        if team_name not in self._qualifying:
+            team_idx = self.fixtures.teams.index(team_name)
+            self._qualifying[team_name] = np.flatnonzero(self.points[:, team_idx] >= self.qualifying_points)
+        return self._qualifying[team_name]
+
+    # Simulation numbers in which at least one team qualifies
+    def any_qualifying_indices(self):
+        return np.flatnonzero((self.points >= self.qualifying_points).any(axis=1))
+
+    # Decode (match, winner) pairs for each requested simulation, a chunk at a time
+    def iter_game_results(self, sim_nums, chunk_size=4096):
+        labels = match_labels(self.fixtures)
+        for start in range(0, len(sim_nums), chunk_size):
+            chunk = sim_nums[start:start + chunk_size]
+            for sim_num, outcome_row in zip(chunk.tolist(), self.outcomes(chunk)):
+                yield sim_num, list(zip(labels, winner_names(self.fixtures, outcome_row)))
+
+    # (simulation number, team points, game results) for every qualifying scenario of a team
+    def qualifying_scenarios(self, team_name):
+        team_idx = self.fixtures.teams.index(team_name)
+        sim_nums = self.qualifying_indices(team_name)
+        for sim_num, game_results in self.iter_game_results(sim_nums):
+            yield sim_num, int(self.points[sim_num, team_idx]), game_results
+
+    # (simulation number, game results) for every simulation where some team qualifies
+    def qualifying_simulations(self):
+        yield from self.iter_game_results(self.any_qualifying_indices())
+
+
+# Build a ScenarioStore from an all-simulations CSV export (Simulation Number,
+# Match, Winner). `matches` gives the fixture order (Home Team / Away Team
+# columns); by default it is taken from the "Home vs Away" labels in the file.
+# Returns the store and the CSV's simulation numbers, one per store row.
+def read_simulations_csv(path, base_points, qualifying_points, matches=None):
+    import pandas as pd
+
+    simulations = pd.read_csv(path)
+    simulated_labels = simulations['Match'].str.strip()
+    if matches is None:
+        pairs = [label.split(' vs ', 1) for label in simulated_labels.unique()]
+        matches = pd.DataFrame(pairs, columns=['Home Team', 'Away Team'])
+    fixtures = compile_fixtures(matches, base_points)
+
+    # Scatter every CSV row into a (simulations x matches) outcome matrix
+    column = {label: j for j, label in enumerate(match_labels(fixtures))}
+    sim_index, sim_numbers = pd.factorize(simulations['Simulation Number'], sort=True)
+    match_index = simulated_labels.map(column).to_numpy()
+    home_names = np.array(fixtures.teams)[fixtures.home][match_index]
+    outcomes = np.zeros((len(sim_numbers), len(fixtures.home)), dtype=np.uint8)
+    outcomes[sim_index, match_index] = simulations['Winner'].str.strip().to_numpy() == home_names
+
+    store = ScenarioStore(fixtures, qualifying_points)
+    for start in range(0, len(outcomes), CSV_CHUNK_SIZE):
+        store.add_batch(outcomes[start:start + CSV_CHUNK_SIZE])
+    return store, np.asarray(sim_numbers)
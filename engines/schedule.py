@@ -0,0 +1,185 @@
+import csv
+import hashlib
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from .fixtures import Fixtures
+
+# Result codes in Schedule.result
+PENDING = -1
+AWAY_WIN = 0
+HOME_WIN = 1
+TIE = 2
+
+# Compiled schedule: teams in order of first appearance, one entry per match in
+# the other arrays. Team names only live in `teams`; everything else is integers.
+Schedule = namedtuple('Schedule', ['teams', 'match_numbers', 'home', 'away', 'result'])
+
+_ARRAYS = ('match_numbers', 'home', 'away', 'result')
+
+
+# Compile CSV rows (Match Number, Home Team, Away Team, Result) into a Schedule.
+# Results must name one of the two teams, be TIE, or be blank for an unplayed match.
+# Given `teams`, any other team name is rejected instead of becoming a new team.
+def compile_schedule(rows, teams=None):
+    known = None if teams is None else set(teams)
+    team_names, team_index = [], {}
+    match_numbers, home, away, result = [], [], [], []
+    seen_numbers, seen_pairs = set(), set()
+
+    for row in rows:
+        number = int(row['Match Number'])
+        home_team, away_team = row['Home Team'].strip(), row['Away Team'].strip()
+        if home_team == away_team:
+            raise ValueError(f"Match {number}: {home_team} cannot play itself")
+        if number in seen_numbers:
+            raise ValueError(f"Duplicate match number in schedule: {number}")
+        if (home_team, away_team) in seen_pairs:
+            raise ValueError(f"Duplicate fixture in schedule: {home_team} vs {away_team}")
+        seen_numbers.add(number)
+        seen_pairs.add((home_team, away_team))
+
+        for team in (home_team, away_team):
+            if known is not None and team not in known:
+                raise ValueError(f"Unknown team in schedule: {team}")
+            if team not in team_index:
+                team_index[team] = len(team_names)
+                team_names.append(team)
+
+        outcome = (row['Result'] or '').strip()
+        if not outcome:
+            code = PENDING
+        elif outcome == 'TIE':
+            code = TIE
+        elif outcome == home_team:
+            code = HOME_WIN
+        elif outcome == away_team:
+            code = AWAY_WIN
+        else:
+            raise ValueError(f"Match {number}: unknown result {outcome!r} for {home_team} vs {away_team}")
+
+        match_numbers.append(number)
+        home.append(team_index[home_team])
+        away.append(team_index[away_team])
+        result.append(code)
+
+    return Schedule(
+        teams=team_names,
+        match_numbers=np.array(match_numbers, dtype=np.int64),
+        home=np.array(home, dtype=np.intp),
+        away=np.array(away, dtype=np.intp),
+        result=np.array(result, dtype=np.int8),
+    )
+
+
+def read_schedule(path, teams=None):
+    with open(path, newline='', encoding='utf-8') as f:
+        return compile_schedule(csv.DictReader(f), teams)
+
+
+def _cache_path(path):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.npz")
+
+
+# Read a schedule CSV through a compiled sidecar (.<name>.npz next to the CSV).
+# The sidecar is trusted while the CSV's mtime and size are unchanged, otherwise
+# only if the content hash still matches; on a miss the CSV is compiled again.
+def load_schedule(path, teams=None, use_cache=True):
+    if not use_cache:
+        return read_schedule(path, teams)
+
+    cache_path = _cache_path(path)
+    stat = os.stat(path)
+    cached = None
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as data:
+            cached = {name: data[name] for name in data.files}
+
+    if cached is not None and (int(cached['mtime_ns']), int(cached['size'])) == (stat.st_mtime_ns, stat.st_size):
+        return _check_teams(_from_cache(cached), teams)
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    if cached is not None and str(cached['sha256']) == digest:
+        schedule = _check_teams(_from_cache(cached), teams)
+    else:
+        schedule = read_schedule(path, teams)
+
+    try:
+        np.savez(cache_path + '.tmp.npz', mtime_ns=np.int64(stat.st_mtime_ns), size=np.int64(stat.st_size),
+                 sha256=np.str_(digest), teams=np.array(schedule.teams),
+                 **{name: getattr(schedule, name) for name in _ARRAYS})
+        os.replace(cache_path + '.tmp.npz', cache_path)
+    except OSError:
+        pass  # a read-only directory only costs the cache
+    return schedule
+
+
+def _from_cache(cached):
+    return Schedule(teams=cached['teams'].tolist(), **{name: cached[name] for name in _ARRAYS})
+
+
+def _check_teams(schedule, teams):
+    unknown = [] if teams is None else sorted(set(schedule.teams).difference(teams))
+    if unknown:
+        raise ValueError(f"Unknown team in schedule: {unknown[0]}")
+    return schedule
+
+
+# Content hash of a compiled schedule: same teams, fixtures and results, same hash,
+# however the CSV was formatted
+def schedule_hash(schedule):
+    digest = hashlib.sha256('\n'.join(schedule.teams).encode('utf-8'))
+    for name in _ARRAYS:
+        digest.update(np.ascontiguousarray(getattr(schedule, name)).tobytes())
+    return digest.hexdigest()
+
+
+# Points per team from completed results: 2 for a win, 1 each for a TIE
+def schedule_points(schedule):
+    points = np.zeros(len(schedule.teams), dtype=np.int16)
+    np.add.at(points, schedule.home[schedule.result == HOME_WIN], 2)
+    np.add.at(points, schedule.away[schedule.result == AWAY_WIN], 2)
+    np.add.at(points, schedule.home[schedule.result == TIE], 1)
+    np.add.at(points, schedule.away[schedule.result == TIE], 1)
+    return points
+
+
+# Fixtures for the unplayed matches, starting from the current points table
+def upcoming_fixtures(schedule):
+    pending = schedule.result == PENDING
+    return Fixtures(
+        teams=list(schedule.teams),
+        base_points=schedule_points(schedule),
+        home=schedule.home[pending],
+        away=schedule.away[pending],
+        match_numbers=schedule.match_numbers[pending],
+    )
+
+
+# Column lists in the CSV's layout (blank results as None). Anything that only
+# zips over schedule columns, like the rating fits and cache keys, takes this
+# in place of a DataFrame.
+def schedule_columns(schedule, mask=None):
+    if mask is None:
+        mask = np.ones(len(schedule.result), dtype=bool)
+    teams = np.array(schedule.teams, dtype=object)
+    home, away, result = schedule.home[mask], schedule.away[mask], schedule.result[mask]
+    winners = np.where(result == HOME_WIN, teams[home], teams[away])
+    return {
+        'Match Number': schedule.match_numbers[mask].tolist(),
+        'Home Team': teams[home].tolist(),
+        'Away Team': teams[away].tolist(),
+        'Result': [None if code == PENDING else 'TIE' if code == TIE else winner
+                   for code, winner in zip(result.tolist(), winners.tolist())],
+    }
+
+
+# DataFrame of the selected matches, for the legacy row-by-row engines
+def schedule_frame(schedule, mask=None):
+    import pandas as pd
+
+    return pd.DataFrame(schedule_columns(schedule, mask))
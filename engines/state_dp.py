@@ -0,0 +1,105 @@
+import numpy as np
+
+from .elimination import clinch_report, undecided_teams
+from .fixtures import Fixtures
+from .positions import CHUNK_SIZE, PositionTable
+
+
+# Exact joint standings by dynamic programming over points vectors instead of
+# outcome sequences. Matches are folded in one at a time into a table of
+# distinct states (each tracked team's wins so far, packed into one mixed-radix
+# int64 key) with their probability mass; states that coincide are merged after
+# every match, so the table grows with the number of reachable points vectors,
+# not 2^n. Keys stay sorted, so each merge is a two-run stable sort (a linear
+# merge) plus np.add.reduceat.
+#
+# With prune=True, teams already clinched or eliminated for the top `top`
+# (clinch_report) are dropped from the state: an eliminated team has `top` teams
+# strictly above it whatever happens, so it never decides anyone else's top-k
+# finish, and a clinched team always takes one of the places outright, so the
+# rest compete for top - clinched. That keeps the top-k answers exact but not the
+# full position distributions, which need prune=False.
+#
+# Returns ({team: (P(top k) %, P(top k outright) %, P(level on points at the cut) %)},
+# PositionTable over all teams or None when pruned).
+def run_state_dp(fixtures, top=4, prune=True, probabilities=None):
+    team_count = len(fixtures.teams)
+    tracked, decided = list(range(team_count)), {}
+    if prune:
+        report = clinch_report(fixtures, top)
+        tracked = sorted(fixtures.teams.index(team) for team in undecided_teams(report))
+        decided = {t: report[team]['status'] for t, team in enumerate(fixtures.teams) if t not in tracked}
+    places = top - sum(status == 'clinched' for status in decided.values())
+
+    # Per tracked team: its slot in the key and the radix of that slot
+    slot = {t: i for i, t in enumerate(tracked)}
+    own = np.bincount(fixtures.home, minlength=team_count) + np.bincount(fixtures.away, minlength=team_count)
+    spans = np.array([own[t] + 1 for t in tracked], dtype=np.float64)
+    if np.prod(spans) >= 2 ** 62:
+        raise ValueError("Too many undecided teams and matches for a 64-bit state key")
+    radix = np.cumprod(np.concatenate([[1], spans[:-1]])).astype(np.int64) if tracked else np.zeros(0, np.int64)
+
+    keys = np.zeros(1, dtype=np.int64)
+    mass = np.ones(1)
+    for match, (home, away) in enumerate(zip(fixtures.home.tolist(), fixtures.away.tolist())):
+        home_step = radix[slot[home]] if home in slot else 0
+        away_step = radix[slot[away]] if away in slot else 0
+        if home_step == away_step == 0:
+            continue
+        home_probability = 0.5 if probabilities is None else float(probabilities[match])
+        merged = np.concatenate([keys + home_step, keys + away_step])
+        order = np.argsort(merged, kind='stable')
+        merged = merged[order]
+        merged_mass = np.concatenate([mass * home_probability, mass * (1 - home_probability)])[order]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(merged)) + 1])
+        keys = merged[starts]
+        mass = np.add.reduceat(merged_mass, starts)
+
+    tracked_percentages, positions = {}, None
+    if tracked and places > 0:
+        sub_fixtures = Fixtures(
+            teams=[fixtures.teams[t] for t in tracked],
+            base_points=fixtures.base_points[tracked],
+            home=fixtures.home, away=fixtures.away, match_numbers=fixtures.match_numbers,
+        )
+        if not prune:
+            positions = PositionTable(sub_fixtures, places)
+        split = np.zeros((3, len(tracked)))
+        # Decode each key back into final points, a chunk of states at a time
+        for start in range(0, len(keys), CHUNK_SIZE):
+            wins = (keys[start:start + CHUNK_SIZE, None] // radix) % spans.astype(np.int64)
+            points = sub_fixtures.base_points + 2 * wins
+            if prune:
+                split += _top_split(points, mass[start:start + CHUNK_SIZE], places)
+            else:
+                positions.add_batch(None, points, mass[start:start + CHUNK_SIZE])
+        if prune:
+            tracked_percentages = dict(zip(sub_fixtures.teams, (split.T / mass.sum() * 100).tolist()))
+        else:
+            tracked_percentages = positions.top_percentages()
+
+    top_percentages = {}
+    for t, team in enumerate(fixtures.teams):
+        if decided.get(t) == 'clinched':
+            top_percentages[team] = (100.0, 100.0, 0.0)
+        elif decided.get(t) == 'eliminated' or team not in tracked_percentages:
+            top_percentages[team] = (0.0, 0.0, 0.0)
+        else:
+            top_percentages[team] = tracked_percentages[team]
+    return top_percentages, positions
+
+
+# Top-k split from the cut alone: the k-th highest points total in each state.
+# Teams above it are in outright, teams level with it share the places left over
+# equally (outright if the whole tied block fits). Same numbers as PositionTable,
+# without its team-by-team comparison.
+def _top_split(points, weights, places):
+    cut = -np.sort(-points, axis=1)[:, places - 1:places]
+    above_cut = (points > cut).sum(axis=1, keepdims=True)
+    level_cut = (points == cut).sum(axis=1, keepdims=True)
+    fits = above_cut + level_cut <= places
+    at_cut = points == cut
+    outright = (points > cut) | (at_cut & fits)
+    shared = at_cut & ~fits
+    share = np.where(shared, (places - above_cut) / level_cut, outright)
+    return np.stack([weights @ share, weights @ outright, weights @ shared])
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Final points always fit in the uint8 points rows the stores keep
+MAX_POINTS = 255
+
+
+# Every team's full final-points histogram, accumulated once. P(points >= t) for
+# any threshold t then comes from a reversed cumulative sum, so sweeping
+# qualifying points needs neither a rerun nor the per-scenario detail.
+class PointsHistogram:
+    def __init__(self, fixtures):
+        self.fixtures = fixtures
+        self.counts = np.zeros((len(fixtures.teams), MAX_POINTS + 1))
+        self.total = 0.0
+
+    def empty_copy(self):
+        return PointsHistogram(self.fixtures)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.total += other.total
+
+    def add_batch(self, outcomes, points, weights=None):
+        points = np.asarray(points)
+        for team in range(points.shape[1]):
+            self.counts[team] += np.bincount(points[:, team], weights, minlength=MAX_POINTS + 1)
+        self.total += len(points) if weights is None else float(np.sum(weights))
+
+    # Fraction of scenarios in which each team finishes on at least p points, for every p
+    def at_least(self):
+        return np.cumsum(self.counts[:, ::-1], axis=1)[:, ::-1] / self.total
+
+    # {team: {threshold: P(points >= threshold) %}}
+    def threshold_percentages(self, thresholds):
+        tails = self.at_least()
+        return {
+            team: {threshold: float(tails[team_idx, threshold] * 100) for threshold in thresholds}
+            for team_idx, team in enumerate(self.fixtures.teams)
+        }
+
+
+# PointsHistogram from the {team: {points: probability}} distributions run_exact_marginals returns
+def histogram_from_marginals(fixtures, distributions):
+    histogram = PointsHistogram(fixtures)
+    for team_idx, team in enumerate(fixtures.teams):
+        for points, probability in distributions[team].items():
+            histogram.counts[team_idx, points] = probability
+    histogram.total = 1.0
+    return histogram
+
+
+# Parse "16", "14-17" or "14,15,16" into a sorted list of thresholds
+def parse_thresholds(text):
+    thresholds = set()
+    for part in text.split(','):
+        low, _, high = part.strip().partition('-')
+        if not low.strip():
+            raise ValueError(f"Expected points like 16 or 14-17, got {part.strip()!r}")
+        low, high = int(low), int(high or low)
+        if high < low:
+            raise ValueError(f"Range {low}-{high} is reversed; write the lower points first")
+        if not 0 <= low <= high <= MAX_POINTS:
+            raise ValueError(f"Qualifying points out of range: {part.strip()} (0 to {MAX_POINTS})")
+        thresholds.update(range(low, high + 1))
+    return sorted(thresholds)
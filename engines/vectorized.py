@@ -0,0 +1,58 @@
+import numpy as np
+
+from .fixtures import away_points, final_points, swing_matrix, to_percentages
+from .scenario_store import ScenarioStore
+
+DEFAULT_BATCH_SIZE = 1 << 18
+
+
+# One independent child seed per batch, spawned from the master seed. Batch i
+# always draws from child i, so results for a given seed and batch size do not
+# depend on how the batches are spread over processes.
+def batch_seeds(seed, simulations, batch_size=DEFAULT_BATCH_SIZE):
+    batch_count = -(-simulations // batch_size)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(batch_count)
+
+
+# Simulate a single batch from its own seed sequence. `probabilities` holds each
+# match's home-win probability (None is a coin flip); a weighted draw is the same
+# single uniform comparison, so it costs nothing extra.
+def simulate_batch(fixtures, seed_sequence, size, swing=None, floor=None, probabilities=None):
+    rng = np.random.default_rng(seed_sequence)
+    threshold = 0.5 if probabilities is None else np.asarray(probabilities, dtype=np.float32)
+    outcomes = rng.random((size, len(fixtures.home)), dtype=np.float32) < threshold
+    points = final_points(fixtures, outcomes, swing, floor)
+    return outcomes, points
+
+
+# Draw simulations in fixed-size batches so memory stays bounded for huge runs.
+# Yields the index of the first simulation, the outcome matrix and final points.
+def iter_monte_carlo_batches(fixtures, simulations, seed=None, batch_size=DEFAULT_BATCH_SIZE, probabilities=None):
+    swing = swing_matrix(fixtures)
+    floor = away_points(fixtures)
+
+    for batch, seed_sequence in enumerate(batch_seeds(seed, simulations, batch_size)):
+        start = batch * batch_size
+        size = min(batch_size, simulations - start)
+        outcomes, points = simulate_batch(fixtures, seed_sequence, size, swing, floor, probabilities)
+        yield start, outcomes, points
+
+
+# Batched replacement for app.run_monte_carlo: counts qualifiers with array ops
+# instead of walking matches.iterrows() once per simulation. Collectors (e.g. a
+# PositionTable) receive every batch's outcomes and final points.
+def run_vectorized_monte_carlo(fixtures, qualifying_points, simulations=1_000_000, seed=None,
+                               batch_size=DEFAULT_BATCH_SIZE, keep_scenarios=False, collectors=(),
+                               probabilities=None):
+    qualification_counts = np.zeros(len(fixtures.teams), dtype=np.int64)
+    store = ScenarioStore(fixtures, qualifying_points) if keep_scenarios else None
+    sinks = list(collectors) + ([store] if store is not None else [])
+
+    for _, outcomes, points in iter_monte_carlo_batches(fixtures, simulations, seed, batch_size, probabilities):
+        qualification_counts += np.count_nonzero(points >= qualifying_points, axis=0)
+        for sink in sinks:
+            sink.add_batch(outcomes, points)
+
+    return to_percentages(fixtures, qualification_counts, simulations), store
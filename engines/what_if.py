@@ -0,0 +1,119 @@
+import numpy as np
+
+from .fixtures import final_points, swing_matrix, to_percentages
+from .gray_code import gray_code_outcomes
+from .positions import PositionTable
+from .vectorized import iter_monte_carlo_batches
+
+# Up to this many remaining matches every outcome is enumerated once and shared
+WHAT_IF_EXACT_LIMIT = 20
+WHAT_IF_SIMULATIONS = 200_000
+
+
+# {match number: winner name} -> sorted [(match index, home won)]
+def _pins(fixtures, results):
+    index = {number: j for j, number in enumerate(fixtures.match_numbers.tolist())}
+    pins = []
+    for number, winner in results.items():
+        if int(number) not in index:
+            raise ValueError(f"Match {number} is not among the remaining fixtures")
+        match = index[int(number)]
+        home, away = fixtures.teams[fixtures.home[match]], fixtures.teams[fixtures.away[match]]
+        if winner not in (home, away):
+            raise ValueError(f"Match {number}: {winner} is not playing in {home} vs {away}")
+        pins.append((match, winner == home))
+    return sorted(pins)
+
+
+# Identical final tables collapsed into one row each, carrying their total weight;
+# positions and qualification only depend on the table. Each team's points lie in
+# base .. base + 2 * (own matches), so a table packs into one mixed-radix int64
+# key, which sorts far faster than raw rows.
+def _distinct_tables(fixtures, points, weights=None):
+    own = np.bincount(fixtures.home, minlength=len(fixtures.teams)) + \
+        np.bincount(fixtures.away, minlength=len(fixtures.teams))
+    span = 2 * own + 1
+    if np.prod(span.astype(np.float64)) < 2 ** 62:
+        radix = np.cumprod(np.concatenate([[1], span[:-1]])).astype(np.int64)
+        keys = ((np.asarray(points, dtype=np.int64) - fixtures.base_points) * radix).sum(axis=1)
+    else:
+        rows = np.ascontiguousarray(points, dtype=np.uint8)
+        keys = rows.view(np.dtype((np.void, rows.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    mass = np.bincount(inverse.ravel(), weights, minlength=len(first))
+    return np.asarray(points[first], dtype=np.int16), mass
+
+
+# Visit scenarios in sorted pin order, extending a stack of partial states, so
+# scenarios that share leading pins share the work done for them
+def _walk(pin_lists, root, extend):
+    stack = []
+    for scenario in sorted(range(len(pin_lists)), key=lambda i: pin_lists[i]):
+        pins = pin_lists[scenario]
+        common = 0
+        while common < min(len(stack), len(pins)) and stack[common][0] == pins[common]:
+            common += 1
+        del stack[common:]
+        for pin in pins[common:]:
+            stack.append((pin, extend(stack[-1][1] if stack else root, pin)))
+        yield scenario, stack[-1][1] if stack else root
+
+
+# Evaluate a batch of what-ifs, each a {match number: winner} dict of pinned
+# results ({} is the unconditional run), against one shared set of outcomes:
+# every outcome when at most exact_limit matches remain, otherwise one Monte
+# Carlo sample. Exact runs keep the rows that agree with a scenario's pins
+# (weighted rows renormalise to the conditional probabilities); sampled runs
+# overwrite the pinned columns of every row, which, with matches independent,
+# is an exact draw from the conditional distribution. Returns, per scenario,
+# (qualification percentages, PositionTable or None when positions=False).
+def run_what_ifs(fixtures, qualifying_points, scenarios, simulations=WHAT_IF_SIMULATIONS, seed=None,
+                 exact_limit=WHAT_IF_EXACT_LIMIT, top=4, probabilities=None, positions=True):
+    pin_lists = [_pins(fixtures, results) for results in scenarios]
+    match_count = len(fixtures.home)
+    swing = swing_matrix(fixtures, dtype=np.int16)
+
+    if match_count <= exact_limit:
+        outcomes = gray_code_outcomes(match_count, 0, 2 ** match_count)
+        points = final_points(fixtures, outcomes)
+        weights = None
+        if probabilities is not None:
+            weights = np.where(outcomes, probabilities, 1 - np.asarray(probabilities)).prod(axis=1)
+
+        def extend(rows, pin):
+            match, home_won = pin
+            return rows[outcomes[rows, match] == home_won]
+
+        def evaluate(rows):
+            return points[rows], None if weights is None else weights[rows]
+
+        states = _walk(pin_lists, np.arange(len(outcomes)), extend)
+    else:
+        batches = list(iter_monte_carlo_batches(fixtures, simulations, seed, probabilities=probabilities))
+        outcomes = np.concatenate([batch_outcomes for _, batch_outcomes, _ in batches])
+        points = np.concatenate([batch_points for _, _, batch_points in batches])
+
+        def extend(pinned_points, pin):
+            match, home_won = pin
+            change = (home_won - outcomes[:, match].astype(np.int16))[:, None] * swing[match]
+            return pinned_points + change
+
+        def evaluate(pinned_points):
+            return pinned_points, None
+
+        states = _walk(pin_lists, points, extend)
+
+    results = [None] * len(scenarios)
+    evaluated = {}
+    for scenario, state in states:
+        pins = tuple(pin_lists[scenario])
+        if pins not in evaluated:
+            tables, mass = _distinct_tables(fixtures, *evaluate(state))
+            table = None
+            if positions:
+                table = PositionTable(fixtures, top)
+                table.add_batch(None, tables, mass)
+            counts, total = mass @ (tables >= qualifying_points), float(mass.sum())
+            evaluated[pins] = (to_percentages(fixtures, counts, total), table)
+        results[scenario] = evaluated[pins]
+    return results
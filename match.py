@@ -1,52 +1,48 @@
+import os
+
+import numpy as np
 import pandas as pd
-from collections import defaultdict
 
-# File paths (make sure to use raw strings)
-actual_file = r'C:\Kani_Personal\Cricket_Study\ipl_simulation\ipl_2024_schedule.csv'
-simulation_file = r'C:\Kani_Personal\Cricket_Study\ipl_simulation\all.csv'
+from engines.backtest import backtest, load_simulations_csv
+from engines.scenario_file import open_scenarios
+
+# Files sit next to this script
+base_dir = os.path.dirname(os.path.abspath(__file__))
+# Season app.py simulates; its results are compared once they are in
+actual_file = os.path.join(base_dir, 'ipl_2025_schedule.csv')
+# A scenario file (.sims) is memory-mapped; the CSV export is still accepted
+simulation_file = os.path.join(base_dir, 'all.sims')
+
+QUALIFYING_POINTS = 16  # threshold the simulations were run with, for the Brier score
+MATCH_THRESHOLD = 95    # report simulations that got at least this % of results right
+TOP_K = 10
 
-# Load data
+# Load data; only matches present in the simulations are compared, and TIEs are skipped
 actual_df = pd.read_csv(actual_file)
-simulation_df = pd.read_csv(simulation_file)
-
-# Filter actual results from Match 56 onward and drop NA (results not yet filled)
-actual_df = actual_df[actual_df['Match Number'] >= 56]
-actual_df = actual_df.dropna(subset=['Result'])
-
-# Build actual results mapping: "Home vs Away" => Winner
-actual_results = {
-    f"{row['Home Team']} vs {row['Away Team']}": row['Result']
-    for _, row in actual_df.iterrows()
-}
-
-# Group simulations by simulation number
-simulation_groups = simulation_df.groupby('Simulation Number')
-
-matched_simulations = []
-
-# Compare each simulation
-for sim_number, sim_data in simulation_groups:
-    total = 0
-    correct = 0
-    for _, row in sim_data.iterrows():
-        match = row['Match'].strip()
-        predicted_winner = row['Winner'].strip()
-
-        # Exclude the matches with 'TIE' result from the actual data
-        if match in actual_results and actual_results[match] != 'TIE':
-            total += 1
-            if actual_results[match] == predicted_winner:
-                correct += 1
-
-    if total > 0:
-        match_percentage = (correct / total) * 100
-        if match_percentage >= 95:
-            matched_simulations.append((sim_number, match_percentage))
-
-# Display matched simulations
-if matched_simulations:
-    print("Simulations with ≥ 70% match:")
-    for sim_number, percent in matched_simulations:
-        print(f"Simulation {sim_number}: {percent:.2f}% match")
+if simulation_file.endswith('.sims'):
+    store = open_scenarios(simulation_file)
+    sim_numbers = np.arange(len(store))
+else:
+    store, sim_numbers = load_simulations_csv(simulation_file, actual_df, QUALIFYING_POINTS)
+report = backtest(store, actual_df, k=TOP_K)
+compared = report['compared']
+
+if compared == 0:
+    print("None of the simulated matches have an actual result yet.")
 else:
-    print("No simulations matched ≥ 70% of actual results.")
+    # Every simulation was scored in one pass; threshold and print from the distances
+    match_percentage = 100 * (compared - report['distances']) / compared
+    matched = np.flatnonzero(match_percentage >= MATCH_THRESHOLD)
+    if len(matched):
+        print(f"Simulations with ≥ {MATCH_THRESHOLD}% match:")
+        for index in matched.tolist():
+            print(f"Simulation {sim_numbers[index]}: {match_percentage[index]:.2f}% match")
+    else:
+        print(f"No simulations matched ≥ {MATCH_THRESHOLD}% of actual results.")
+
+    print(f"\nClosest {len(report['nearest'])} simulations over {compared} matches:")
+    for index, distance, percent in report['nearest']:
+        print(f"Simulation {sim_numbers[index]}: {distance} wrong, {percent:.2f}% match")
+
+if report['brier'] is not None:
+    print(f"\nBrier score of qualification probabilities (≥ {QUALIFYING_POINTS} points): {report['brier']:.4f}")
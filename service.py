@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from engines import ScenarioStore
+from engines.planner import plan_run, run_plan
+from engines.schedule import load_schedule, schedule_hash, upcoming_fixtures
+from engines.thresholds import MAX_POINTS, parse_thresholds
+
+# Local JSON service over one schedule CSV. Results are computed once per schedule
+# (keyed by its content hash) in a worker process, on the engines the planner picks;
+# the CSV is polled, and while a changed schedule is being recomputed the last
+# results are served marked stale.
+#
+#   GET /status
+#   GET /probabilities?q=16        qualification, top-4 and position probabilities
+#   GET /thresholds?q=14-18        qualification probabilities for several thresholds
+#   GET /scenarios?team=...&q=16&n=10   sampled scenarios where the team reaches q
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEDULE_FILE = os.path.join(BASE_DIR, "ipl_2025_schedule.csv")
+HOST = "127.0.0.1"
+PORT = 8765
+# Seconds between checks of the CSV for changes
+POLL_INTERVAL = 2.0
+# Exact engines when the planner expects them to finish within this many seconds, else this many simulations
+EXACT_TIME_BUDGET = 30
+SIMULATIONS = 200_000
+SIMULATION_SEED = 0
+# Scenarios kept per schedule for /scenarios, and the default number returned
+SAMPLE_POOL = 10_000
+SAMPLE_SIZE = 10
+# Results kept for this many distinct schedules, so undoing an edit is instant
+CACHE_SIZE = 4
+RECOMPUTE_WORKERS = 1
+
+Results = namedtuple('Results', ['schedule_hash', 'computed_at', 'method', 'scenarios', 'matches',
+                                 'positions', 'histogram', 'sample'])
+
+
+# Everything the endpoints need for one schedule; runs in a worker process
+def compute_results(path):
+    schedule = load_schedule(path)
+    fixtures = upcoming_fixtures(schedule)
+    match_count = len(fixtures.home)
+    plan = plan_run(fixtures, {'thresholds', 'positions', 'scenarios'}, simulations=SIMULATIONS,
+                    time_budget=EXACT_TIME_BUDGET)
+    result = run_plan(plan, fixtures, 0, seed=SIMULATION_SEED)
+    positions, histogram, store = result.positions, result.histogram, result.store
+    method = '+'.join(name for name, _ in plan.engines)
+    scenarios = 2 ** match_count if plan.exact else plan.simulations
+
+    rng = np.random.default_rng(SIMULATION_SEED)
+    rows = np.sort(rng.choice(len(store), min(SAMPLE_POOL, len(store)), replace=False))
+    sample = ScenarioStore.from_arrays(fixtures, 0, store.bits[rows], store.points[rows])
+    return Results(schedule_hash(schedule), time.time(), method, scenarios, match_count, positions, histogram, sample)
+
+
+def _threshold(value):
+    threshold = int(value)
+    if not 0 <= threshold <= MAX_POINTS:
+        raise ValueError(f"Qualifying points out of range: {threshold}")
+    return threshold
+
+
+class ProbabilityService:
+    def __init__(self, path, pool):
+        self.path = path
+        self.pool = pool
+        self.cache = OrderedDict()
+        self.pending = {}
+        self.current_hash = None
+        self._stat = None
+
+    # Re-read the CSV if it changed and start a recompute unless its results are cached or on the way
+    async def refresh(self):
+        stat = os.stat(self.path)
+        if (stat.st_mtime_ns, stat.st_size) == self._stat:
+            return
+        loop = asyncio.get_running_loop()
+        schedule = await loop.run_in_executor(None, load_schedule, self.path)
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+        self.current_hash = schedule_hash(schedule)
+        if self.current_hash in self.cache:
+            self.cache.move_to_end(self.current_hash)
+        elif self.current_hash not in self.pending:
+            future = asyncio.wrap_future(self.pool.submit(compute_results, self.path))
+            self.pending[self.current_hash] = future
+            future.add_done_callback(lambda done, key=self.current_hash: self._finished(key, done))
+
+    def _finished(self, key, future):
+        del self.pending[key]
+        if future.cancelled() or future.exception() is not None:
+            print(f"Recompute failed: {future.exception() if not future.cancelled() else 'cancelled'}")
+            self._stat = None  # try again on the next poll
+            return
+        results = future.result()
+        # The CSV may have changed again before the worker read it; file under what was computed
+        self.cache[results.schedule_hash] = results
+        self.cache.move_to_end(results.schedule_hash)
+        while len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+    async def watch(self):
+        while True:
+            try:
+                await self.refresh()
+            except (OSError, ValueError) as error:
+                print(f"Cannot load {self.path}: {error}")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    # (results, stale): the current schedule's results, else the newest cached ones while
+    # they are recomputed, else wait for the first computation
+    async def results(self):
+        while True:
+            if self.current_hash in self.cache:
+                return self.cache[self.current_hash], False
+            if self.cache:
+                return next(reversed(self.cache.values())), True
+            if self.current_hash in self.pending:
+                await asyncio.shield(self.pending[self.current_hash])
+            else:
+                await asyncio.sleep(POLL_INTERVAL)
+
+    async def respond(self, target):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        results, stale = await self.results()
+        body = {
+            'schedule_hash': results.schedule_hash,
+            'stale': stale,
+            'computed_at': results.computed_at,
+            'method': results.method,
+            'scenarios': results.scenarios,
+            'matches': results.matches,
+        }
+        teams = results.positions.fixtures.teams
+        if url.path == '/status':
+            body['computing'] = sorted(self.pending)
+        elif url.path == '/probabilities':
+            threshold = _threshold(query.get('q', '16'))
+            tails = results.histogram.at_least()
+            body['qualification'] = {team: float(tails[i, threshold] * 100) for i, team in enumerate(teams)}
+            body['top'] = results.positions.top_percentages()
+            body['positions'] = results.positions.position_percentages()
+        elif url.path == '/thresholds':
+            thresholds = [_threshold(threshold) for threshold in parse_thresholds(query.get('q', '14-18'))]
+            body['thresholds'] = results.histogram.threshold_percentages(thresholds)
+        elif url.path == '/scenarios':
+            team = query.get('team')
+            if team not in teams:
+                return 404, {'error': f"Unknown team: {team}"}
+            threshold, count = _threshold(query.get('q', '16')), int(query.get('n', SAMPLE_SIZE))
+            if count < 0:
+                raise ValueError(f"Number of scenarios must not be negative: {count}")
+            sample = results.sample
+            count = min(count, len(sample))
+            team_idx = teams.index(team)
+            rows = np.flatnonzero(sample.points[:, team_idx] >= threshold)[:count]
+            body['scenarios'] = [
+                {'points': dict(zip(teams, sample.points[row].tolist())), 'results': game_results}
+                for row, game_results in sample.iter_game_results(rows)
+            ]
+        else:
+            return 404, {'error': f"Unknown path: {url.path}"}
+        return 200, body
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1')
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # headers are not needed
+            method, target, _ = request_line.split(' ', 2)
+            if method != 'GET':
+                status, body = 405, {'error': f"Method not allowed: {method}"}
+            else:
+                status, body = await self.respond(target)
+        except ValueError as error:
+            status, body = 400, {'error': str(error)}
+        except Exception as error:  # every request gets an answer, even when a handler breaks
+            print(f"Request failed: {error!r}")
+            status, body = 500, {'error': 'Internal server error'}
+        payload = json.dumps(body).encode('utf-8')
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  500: 'Internal Server Error'}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(path=SCHEDULE_FILE, host=HOST, port=PORT):
+    with ProcessPoolExecutor(max_workers=RECOMPUTE_WORKERS) as pool:
+        service = ProbabilityService(path, pool)
+        await service.refresh()
+        watcher = asyncio.create_task(service.watch())
+        server = await asyncio.start_server(service.handle, host, port)
+        print(f"Serving {os.path.basename(path)} on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
@@ -0,0 +1,38 @@
+import json
+import sys
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from service import HOST, PORT
+
+
+# GET one endpoint of the local service (service.py) and decode its JSON
+def query(path, host=HOST, port=PORT, timeout=60, **params):
+    url = f"http://{host}:{port}{path}"
+    if params:
+        url += '?' + urlencode(params)
+    with urlopen(url, timeout=timeout) as response:
+        return json.load(response)
+
+
+def main():
+    status = query('/status')
+    state = 'stale, recomputing' if status['stale'] else 'current'
+    print(f"Schedule {status['schedule_hash'][:12]} ({state}): {status['method']} over {status['scenarios']:,} "
+          f"scenarios, {status['matches']} matches left")
+
+    probabilities = query('/probabilities', q=16)
+    print("\nQualification (≥ 16 points) and Top 4 probabilities:")
+    for team, percentage in sorted(probabilities['qualification'].items(), key=lambda x: x[1], reverse=True):
+        print(f"{team:<30} {percentage:6.2f}%  {probabilities['top'][team][0]:6.2f}%")
+
+    team = sys.argv[1] if len(sys.argv) > 1 else next(iter(probabilities['qualification']))
+    scenarios = query('/scenarios', team=team, q=16, n=1)['scenarios']
+    if scenarios:
+        print(f"\nOne scenario where {team} reaches 16 points:")
+        for match, winner in scenarios[0]['results']:
+            print(f"{match}: {winner}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+from engines.scenario_file import export_csv, open_scenarios
+
+# Text export of a scenario file (.sims) saved by app.py, in the one-row-per-(simulation, match)
+# CSV layout the other tools read; the scenario file is memory-mapped and written out in chunks
+SIMULATION_FILE = "all.sims"
+CSV_FILE = "all_simulations.csv"
+
+store = open_scenarios(SIMULATION_FILE)
+export_csv(store, CSV_FILE)
+print(f"All {len(store):,} simulations from {SIMULATION_FILE} saved to {CSV_FILE}")
@@ -0,0 +1,191 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from engines import PositionTable, compile_fixtures, run_exact_marginals, run_parallel_monte_carlo, \
+    run_vectorized_monte_carlo
+from engines.elimination import clinch_report
+from engines.gray_code import run_gray_code_enumeration, run_gray_code_histogram
+from engines.state_dp import run_state_dp
+from engines.what_if import run_what_ifs
+
+QUALIFYING_POINTS = 12
+TOP = 4
+
+
+# A small league with some matches left, base points on a coarse grid so teams often finish level
+def small_league(seed, team_count=7, match_count=12):
+    rng = np.random.default_rng(seed)
+    teams = [f"Team {i + 1}" for i in range(team_count)]
+    pairs = [(home, away) for home in range(team_count) for away in range(team_count) if home != away]
+    chosen = rng.choice(len(pairs), match_count, replace=False)
+    matches = {
+        'Match Number': list(range(101, 101 + match_count)),
+        'Home Team': [teams[pairs[i][0]] for i in chosen],
+        'Away Team': [teams[pairs[i][1]] for i in chosen],
+    }
+    base_points = {team: int(points) for team, points in zip(teams, rng.choice([2, 4, 6, 8, 10, 14], team_count))}
+    return compile_fixtures(matches, base_points)
+
+
+# Every outcome by itertools.product with its final points and probability
+def brute_force(fixtures, probabilities=None):
+    match_count = len(fixtures.home)
+    outcomes = np.array(list(product([False, True], repeat=match_count)), dtype=bool)
+    points = np.tile(fixtures.base_points.astype(np.int64), (len(outcomes), 1))
+    for j, (home, away) in enumerate(zip(fixtures.home, fixtures.away)):
+        points[:, home] += 2 * outcomes[:, j]
+        points[:, away] += 2 * ~outcomes[:, j]
+    if probabilities is None:
+        weights = np.full(len(outcomes), 1 / len(outcomes))
+    else:
+        weights = np.where(outcomes, probabilities, 1 - probabilities).prod(axis=1)
+    return outcomes, points, weights
+
+
+# Per team: P(top k), P(top k outright), P(level on points at the cut) and the position
+# distribution, with teams level on points sharing their places equally
+def brute_force_positions(points, weights, top=TOP):
+    team_count = points.shape[1]
+    positions = np.zeros((team_count, team_count))
+    split = np.zeros((team_count, 3))
+    for row, weight in zip(points, weights):
+        for team in range(team_count):
+            above = int((row > row[team]).sum())
+            level = int((row == row[team]).sum())
+            positions[team, above:above + level] += weight / level
+            split[team, 1] += weight * (above + level <= top)
+            split[team, 2] += weight * (above < top < above + level)
+    split[:, 0] = positions[:, :top].sum(axis=1)
+    return positions * 100, split * 100
+
+
+def as_array(fixtures, percentages):
+    return np.array([percentages.get(team, 0.0) for team in fixtures.teams])
+
+
+def random_probabilities(fixtures, seed):
+    return np.random.default_rng(seed).uniform(0.2, 0.8, len(fixtures.home))
+
+
+CASES = [(seed, match_count, weighted) for seed, match_count in [(0, 10), (1, 12), (2, 14)]
+         for weighted in (False, True)]
+
+
+@pytest.fixture(params=CASES, ids=lambda case: f"seed{case[0]}-{case[1]}matches-{'weighted' if case[2] else 'even'}")
+def league(request):
+    seed, match_count, weighted = request.param
+    fixtures = small_league(seed, match_count=match_count)
+    probabilities = random_probabilities(fixtures, seed) if weighted else None
+    return fixtures, probabilities, brute_force(fixtures, probabilities)
+
+
+def test_gray_code_matches_brute_force(league):
+    fixtures, probabilities, (outcomes, points, weights) = league
+    positions = PositionTable(fixtures, TOP)
+    qualification, store = run_gray_code_enumeration(fixtures, QUALIFYING_POINTS, keep_scenarios=True,
+                                                     collectors=[positions], probabilities=probabilities)
+    expected = weights @ (points >= QUALIFYING_POINTS) * 100
+    np.testing.assert_allclose(as_array(fixtures, qualification), expected, atol=1e-9)
+
+    # The store holds every outcome exactly once, with its points
+    assert len(store) == len(outcomes)
+    keys = np.packbits(outcomes, axis=1, bitorder='little')
+    assert {row.tobytes() for row in store.bits} == {row.tobytes() for row in keys}
+    order = np.lexsort(store.bits.T[::-1])
+    np.testing.assert_array_equal(store.points[order], points[np.lexsort(keys.T[::-1])])
+
+    expected_positions, expected_split = brute_force_positions(points, weights)
+    np.testing.assert_allclose(np.array(list(positions.position_percentages().values())), expected_positions,
+                               atol=1e-9)
+    np.testing.assert_allclose(np.array(list(positions.top_percentages().values())), expected_split, atol=1e-9)
+
+
+def test_gray_code_histogram_matches_brute_force(league):
+    fixtures, probabilities, (_, points, weights) = league
+    histogram = run_gray_code_histogram(fixtures, probabilities=probabilities)
+    for threshold in range(0, 30, 2):
+        expected = weights @ (points >= threshold) * 100
+        got = [histogram.threshold_percentages([threshold])[team][threshold] for team in fixtures.teams]
+        np.testing.assert_allclose(got, expected, atol=1e-9)
+
+
+@pytest.mark.parametrize('prune', [True, False])
+def test_state_dp_matches_brute_force(league, prune):
+    fixtures, probabilities, (_, points, weights) = league
+    top, positions = run_state_dp(fixtures, TOP, prune=prune, probabilities=probabilities)
+    expected_positions, expected_split = brute_force_positions(points, weights)
+    np.testing.assert_allclose(np.array([top[team] for team in fixtures.teams]), expected_split, atol=1e-9)
+    if prune:
+        assert positions is None
+    else:
+        np.testing.assert_allclose(np.array(list(positions.position_percentages().values())), expected_positions,
+                                   atol=1e-9)
+
+
+def test_exact_marginals_match_brute_force(league):
+    fixtures, probabilities, (_, points, weights) = league
+    qualification, distributions = run_exact_marginals(fixtures, QUALIFYING_POINTS, probabilities=probabilities)
+    np.testing.assert_allclose(as_array(fixtures, qualification), weights @ (points >= QUALIFYING_POINTS) * 100,
+                               atol=1e-9)
+    for team_idx, team in enumerate(fixtures.teams):
+        for value, probability in distributions[team].items():
+            assert probability == pytest.approx(weights[points[:, team_idx] == value].sum(), abs=1e-12)
+
+
+def test_what_ifs_match_conditional_brute_force(league):
+    fixtures, probabilities, (outcomes, points, weights) = league
+    home_win = {int(fixtures.match_numbers[0]): fixtures.teams[fixtures.home[0]]}
+    both = {**home_win, int(fixtures.match_numbers[3]): fixtures.teams[fixtures.away[3]]}
+    conditions = [np.ones(len(outcomes), dtype=bool), outcomes[:, 0], outcomes[:, 0] & ~outcomes[:, 3]]
+    results = run_what_ifs(fixtures, QUALIFYING_POINTS, [{}, home_win, both], probabilities=probabilities)
+    for (qualification, positions), condition in zip(results, conditions):
+        conditional = weights[condition] / weights[condition].sum()
+        np.testing.assert_allclose(as_array(fixtures, qualification),
+                                   conditional @ (points[condition] >= QUALIFYING_POINTS) * 100, atol=1e-9)
+        _, expected_split = brute_force_positions(points[condition], conditional)
+        np.testing.assert_allclose(np.array(list(positions.top_percentages().values())), expected_split,
+                                   atol=1e-9)
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_clinch_statuses_match_brute_force(seed):
+    fixtures = small_league(seed + 10, match_count=12)
+    _, points, _ = brute_force(fixtures)
+    report = clinch_report(fixtures, TOP)
+    for team_idx, team in enumerate(fixtures.teams):
+        others = np.delete(points, team_idx, axis=1)
+        own = points[:, [team_idx]]
+        above = (others > own).sum(axis=1)
+        level = (others == own).sum(axis=1)
+        expected = ('clinched' if np.all(above + level < TOP)
+                    else 'eliminated' if np.all(above >= TOP) else 'alive')
+        assert report[team]['status'] == expected, team
+
+
+# Leagues where clinch_report has already decided some teams, which pruning drops from the state
+@pytest.mark.parametrize('seed', [11, 12, 13])
+def test_pruned_state_dp_with_decided_teams(seed):
+    fixtures = small_league(seed, match_count=12)
+    assert any(row['status'] != 'alive' for row in clinch_report(fixtures, TOP).values())
+    _, points, weights = brute_force(fixtures)
+    top, _ = run_state_dp(fixtures, TOP, prune=True)
+    _, expected_split = brute_force_positions(points, weights)
+    np.testing.assert_allclose(np.array([top[team] for team in fixtures.teams]), expected_split, atol=1e-9)
+
+
+def test_parallel_and_vectorized_are_bit_identical():
+    fixtures = small_league(3, match_count=14)
+    probabilities = random_probabilities(fixtures, 3)
+    vectorized_positions, parallel_positions = PositionTable(fixtures), PositionTable(fixtures)
+    vectorized, vectorized_store = run_vectorized_monte_carlo(
+        fixtures, QUALIFYING_POINTS, 10_000, seed=7, batch_size=1_500, keep_scenarios=True,
+        collectors=[vectorized_positions], probabilities=probabilities)
+    parallel, parallel_store = run_parallel_monte_carlo(
+        fixtures, QUALIFYING_POINTS, 10_000, seed=7, workers=2, shard_size=1_500, keep_scenarios=True,
+        collectors=[parallel_positions], probabilities=probabilities)
+    assert vectorized == parallel
+    np.testing.assert_array_equal(vectorized_store.bits, parallel_store.bits)
+    np.testing.assert_array_equal(vectorized_store.points, parallel_store.points)
+    np.testing.assert_array_equal(vectorized_positions.position_mass, parallel_positions.position_mass)
@@ -1,91 +1,43 @@
-import pandas as pd
-import random
-from collections import defaultdict
+import os
 import time
 import csv
-from tabulate import tabulate  # Importing tabulate module
+from engines import compile_fixtures
+from engines.metrics import metrics_for
+from engines.planner import plan_run, run_plan
+from engines.schedule import PENDING, load_schedule, schedule_frame, schedule_points
+
+# Phase timings and counters as one JSON line per run: None for off, "-" for stdout, or a file to append to
+METRICS_OUTPUT = None
+# Phases also run under cProfile when metrics are on, e.g. ("simulate",)
+PROFILE_PHASES = ()
+# Backends run_monte_carlo may choose between
+MONTE_CARLO_ENGINES = ('vectorized', 'parallel')
 
 # Load data from CSV file
 def load_data(file_path):
-    df = pd.read_csv(file_path)
-    upcoming_matches = df[df['Result'].isnull()]
-    points_table = {
-        'Kolkata Knight Riders': 0,
-        'Royal Challengers Bengaluru': 0,
-        'Delhi Capitals': 0,
-        'Mumbai Indians': 0,
-        'Chennai Super Kings': 0,
-        'Rajasthan Royals': 0,
-        'Sunrisers Hyderabad': 0,
-        'Punjab Kings': 0,
-        'Lucknow Super Giants': 0,
-        'Gujarat Titans': 0,
-    }
-
-    # Add points from completed matches
-    completed_matches = df[df['Result'].notnull()]
-    for _, match in completed_matches.iterrows():
-        result = match['Result']
-        if result in points_table:
-            points_table[result] += 2  # Each win = 2 points
+    schedule = load_schedule(file_path)
+    upcoming_matches = schedule_frame(schedule, schedule.result == PENDING)
+
+    # Points from completed matches: 2 for a win, 1 each for a TIE
+    points_table = dict(zip(schedule.teams, schedule_points(schedule).tolist()))
 
     return upcoming_matches, points_table
 
 
-# Simulate one full tournament
-def simulate_tournament(matches, base_points):
-    points = base_points.copy()
-    for _, match in matches.iterrows():
-        home_team = match['Home Team']
-        away_team = match['Away Team']
-        winner = random.choice([home_team, away_team])
-        if winner in points:
-            points[winner] += 2
-    return points
-
-
-# Run Monte Carlo simulations for qualification probabilities
-def run_monte_carlo(matches, base_points, qualifying_points, simulations=50000):
-    qualification_counts = defaultdict(int)
-    team_scenarios = defaultdict(list)
-
-    for sim_num in range(simulations):
-        sim_points = simulate_tournament(matches, base_points)
-
-        # Track qualification for all teams
-        for team, points in sim_points.items():
-            if points >= qualifying_points:
-                qualification_counts[team] += 1
-                team_scenarios[team].append({
-                    'Simulation Number': sim_num,
-                    'Points': points,
-                    'Game Results': get_game_results_for_simulation(matches, sim_points)
-                })
+# Monte Carlo qualification probabilities through the shared engine package; the
+# planner picks the in-process or process-pool sampler for this many simulations.
+# Scenarios come back in a ScenarioStore with the winners actually drawn.
+def run_monte_carlo(matches, base_points, qualifying_points, simulations=50000, seed=None):
+    fixtures = compile_fixtures(matches, base_points)
+    workers = os.cpu_count()
+    plan = plan_run(fixtures, {'qualification', 'scenarios'}, simulations=simulations, workers=workers,
+                    engines=MONTE_CARLO_ENGINES)
+    print(f"Engine: {plan.reason}.")
+    result = run_plan(plan, fixtures, qualifying_points, seed=seed, workers=workers)
 
     # Ensure that all teams are tracked, even those with 0% qualification probability
-    all_teams = set(base_points.keys())  # Get the list of all teams
-    for team in all_teams:
-        if team not in qualification_counts:
-            qualification_counts[team] = 0  # Set to 0% if no qualification found
-
-    # Calculate qualification percentages
-    qualification_percentages = {
-        team: (count / simulations) * 100
-        for team, count in qualification_counts.items()
-    }
-
-    return qualification_percentages, team_scenarios
-
-
-# Function to get game results in each simulation
-def get_game_results_for_simulation(matches, sim_points):
-    game_results = []
-    for _, match in matches.iterrows():
-        home_team = match['Home Team']
-        away_team = match['Away Team']
-        winner = home_team if sim_points.get(home_team, 0) > sim_points.get(away_team, 0) else away_team
-        game_results.append(f"{home_team} vs {away_team}, Winner predicted: {winner}")
-    return game_results
+    qualification_percentages = {team: result.qualification.get(team, 0.0) for team in fixtures.teams}
+    return qualification_percentages, result.store
 
 
 # Save qualifying scenarios to CSV
@@ -100,17 +52,9 @@ def save_qualifying_scenarios_to_csv(team_scenarios, team_name, file_name):
         # Write the headers
         writer.writerow(['Simulation Number', 'Match', 'Winner'])
 
-        # Write each simulation result
-        for scenario in team_scenarios[team_name]:
-            simulation_num = scenario['Simulation Number']
-            game_results = scenario['Game Results']
-
-            # Write each match result as a new line
-            for match_result in game_results:
-                match_info = match_result.split(', Winner predicted: ')
-                match = match_info[0].strip()
-                winner = match_info[1].strip()
-
+        # Write each match result of every qualifying simulation as a new line
+        for simulation_num, _, game_results in team_scenarios.qualifying_scenarios(team_name):
+            for match, winner in game_results:
                 writer.writerow([simulation_num, match, winner])
 
     print(f"Qualifying scenarios for {team_name} saved to {file_name}")
@@ -118,19 +62,24 @@ def save_qualifying_scenarios_to_csv(team_scenarios, team_name, file_name):
 
 # Main entry point
 def main():
-    file_path = "C:\Kani_Personal\Cricket_Study\ipl_simulation\ipl_2024_schedule.csv"
+    file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ipl_2024_schedule.csv")
+    metrics = metrics_for(METRICS_OUTPUT, PROFILE_PHASES)
     qualifying_points = int(input("Enter the qualifying points (e.g., 16): "))
 
     # Ask for number of simulations
     num_simulations = int(input("Enter the number of simulations: "))
 
-    matches, base_points = load_data(file_path)
+    with metrics.phase('load'):
+        matches, base_points = load_data(file_path)
 
     print(f"\nRunning {num_simulations:,} tournament simulations... Please wait.\n")
     start_time = time.time()
 
-    qualification_percentages, team_scenarios = run_monte_carlo(matches, base_points, qualifying_points,
-                                                                num_simulations)
+    with metrics.phase('simulate'):
+        qualification_percentages, team_scenarios = run_monte_carlo(matches, base_points, qualifying_points,
+                                                                    num_simulations)
+    metrics.count('simulations', num_simulations)
+    metrics.count('scenarios_stored', len(team_scenarios))
 
     end_time = time.time()
 
@@ -140,6 +89,7 @@ def main():
         table_data.append([team, f"{percentage:.2f}%"])
 
     # Display the qualification probability in tabular form using tabulate
+    from tabulate import tabulate
     print(f"\nQualification Probabilities (Teams with ≥ {qualifying_points} points):")
     print(tabulate(table_data, headers=["Team", "Qualification Probability"], tablefmt="pretty"))
 
@@ -156,10 +106,14 @@ def main():
             if save_file_input == 'yes':
                 file_name = input(
                     "Enter the name of the file to save results (e.g., qualifying_scenarios.csv): ").strip()
-                save_qualifying_scenarios_to_csv(team_scenarios, team_name, file_name)
+                with metrics.phase('export'):
+                    save_qualifying_scenarios_to_csv(team_scenarios, team_name, file_name)
+                metrics.count_file(file_name)
         else:
             print(f"\nNo qualifying scenarios found for {team_name}.")
 
+    metrics.emit(METRICS_OUTPUT)
+
 
 if __name__ == "__main__":
     main()